@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+""" Measure per-request overhead of getting an executor.
+
+Create a fake playbooks directory, then measure the time cost of:
+
+    1. create a new ``AnsibleExecutor`` for each request (validate the
+       options and the playbooks directory, and log, every time)
+    2. bind the executor created once to the targets of each request
+       (see ``ExecutorPrototype.bind``)
+
+No remote host is contacted, only the executor objects are created.
+
+Usage:
+    python bench/executor_overhead.py [--requests N] [--hosts N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exe.executor import AnsibleExecutor
+
+
+def measure(name, fn, requests):
+    """ Run ``fn`` for ``requests`` times and report time cost. """
+    start = time.time()
+    for _ in range(requests):
+        fn()
+    cost = time.time() - start
+    print("{0:<32} total: {1:.3f}s   per request: {2:.2f}us".format(
+        name, cost, cost * 1000000 / requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--hosts", type=int, default=10)
+    args = parser.parse_args()
+
+    # the executor logs at INFO when created, as the api server does
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, 'w'))
+
+    workdir = tempfile.mkdtemp(prefix="exe-bench-")
+    os.mkdir(os.path.join(workdir, AnsibleExecutor.PLAYBOOKS))
+    open(os.path.join(workdir, AnsibleExecutor.PLAYBOOKS,
+                      AnsibleExecutor.INIT_PB), 'w').close()
+
+    targets = [ "bench-{0}.0ops.io".format(i) for i in range(args.hosts) ]
+    opts = dict(timeout=0, concurrency=10, workdir=workdir)
+
+    try:
+        measure("create executor per request",
+                lambda: AnsibleExecutor(targets, **opts), args.requests)
+
+        executor = AnsibleExecutor([], **opts)
+        measure("bind executor per request",
+                lambda: executor.bind(targets, 30), args.requests)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
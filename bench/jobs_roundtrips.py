@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+""" Count redis round trips of job queries.
+
+Seed fake jobs into redis, then count round trips (one packed command
+sent to redis server) and time cost of:
+
+    1. ``GET /jobs?detail=1`` (load job contexts of all jobs)
+    2. ``GET /jobs/(jid)?outputs=1`` (load return data of all targets)
+
+using both the naive one-by-one loader and the batched loader.
+
+Usage:
+    python bench/jobs_roundtrips.py [--redis-url URL] [--jobs N] [--hosts N]
+
+Note that, this script will create and delete keys inside that redis.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+
+import redis
+import redis.connection
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exe.runner.jobs import Job
+
+
+class RoundTripCounter(object):
+    """ Count ``send_packed_command`` calls of all redis connections. """
+
+    def __init__(self):
+        self.count = 0
+        self._orig = redis.connection.Connection.send_packed_command
+
+    def __enter__(self):
+        counter = self
+        orig = self._orig
+
+        def _send_packed_command(conn, *args, **kwargs):
+            counter.count += 1
+            return orig(conn, *args, **kwargs)
+
+        redis.connection.Connection.send_packed_command = _send_packed_command
+        return self
+
+    def __exit__(self, *exc):
+        redis.connection.Connection.send_packed_command = self._orig
+
+
+def seed(r, njobs, nhosts):
+    """ Create ``njobs`` fake jobs with ``nhosts`` targets each. """
+    targets = [ "bench-{0}.0ops.io".format(i) for i in range(nhosts) ]
+    jobs = []
+    for _ in range(njobs):
+        job = Job(targets, "bench", mutex=False)
+        job.bind(uuid.uuid4().hex)
+
+        pipeline = r.pipeline(False)
+        pipeline.hmset(Job._key(job._id), dict(
+            state=Job.STATE_DONE, targets=json.dumps(targets),
+            operate=job._op, operate_args=json.dumps({}),
+            utag=job._utag, startat=job._startat, error=""))
+        pipeline.zadd(Job._index_key(), {job._id: job._startat})
+        for target in targets:
+            pipeline.rpush(job._data_key(target), json.dumps({"status": 1}))
+        pipeline.execute()
+        jobs.append(job)
+    return jobs
+
+
+def measure(name, fn):
+    """ Run ``fn`` and report round trips and time cost. """
+    with RoundTripCounter() as counter:
+        start = time.time()
+        fn()
+        cost = time.time() - start
+    print("{0:<32} round trips: {1:>8}   time: {2:.3f}s".format(
+        name, counter.count, cost))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--hosts", type=int, default=3000)
+    args = parser.parse_args()
+
+    r = redis.Redis.from_url(args.redis_url, decode_responses=True)
+    print("seeding {0} job(s), and one job with {1} host(s) ...".format(
+        args.jobs, args.hosts))
+    jobs = seed(r, args.jobs, min(args.hosts, 10))
+    big = seed(r, 1, args.hosts)[0]
+    jids = [ job._id for job in jobs ]
+
+    try:
+        measure("jobs detail (one by one)",
+                lambda: [ Job.load_task(jid, r).ctx for jid in jids ])
+        measure("jobs detail (batched)",
+                lambda: [ job.ctx for _, job in Job.load_tasks(jids, r) ])
+
+        def _naive_load_data():
+            for key in big.data_keys:
+                [ json.loads(v) for v in r.lrange(key, 0, -1) ]
+
+        measure("job outputs (one by one)", _naive_load_data)
+        measure("job outputs (batched)", lambda: big.load_data(r))
+    finally:
+        for job in jobs + [big]:
+            job.sweep(r)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,14 @@ ERR_BAD_EXTRAOPTS  = "extra opts for task handler should be an json object"
 ERR_BAD_SERVPARAMS = "bad service name or state"
 ERR_BAD_TSKPARAMS  = "bad task params"
 ERR_JOB_NOT_EXISTS = "job not exists"
+ERR_BAD_PAGINATION = "limit/since/until should be non-negative integer or omitted"
+ERR_BAD_OUTPUTRANGE = "offset/limit should be non-negative integer or omitted"
+ERR_NO_RESOURCE    = "no such resource"
+ERR_BAD_STATE      = "state should be one of job state or omitted"
+ERR_BAD_BATCHSIZE  = "batch_size should be positive integer, percentage string (e.g. \"25%\") or omitted"
+ERR_BAD_TIMEOUT    = "timeout should be non-negative integer or omitted"
+ERR_BAD_STREAM     = "stream should be boolean (true/false, 1/0, yes/no) or omitted"
+ERR_BAD_MAXFAIL    = "max_fail_percentage should be number between 0 and 100 or omitted"
 
 ## Remote Service State Emum ##
 STATE_STARTED   = 0
@@ -23,8 +31,12 @@ STATE_RESTARTED = 2
 API_SERVER_DEFAULT_CONF = dict(
     listen_addr = "127.0.0.1",
     listen_port = 16808,
-    pid_file    = ""
+    pid_file    = "",
+    thread_pool = 10
 )
 
 ## Server Consts ##
 API_SERVER_TOKEN = "0ops Api Server"
+API_CURSOR_HEADER = "X-Exe-Cursor"
+API_TOTAL_HEADER = "X-Exe-Total"
+API_AGE_HEADER = "Age"    # seconds passed since cached content generated
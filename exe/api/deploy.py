@@ -36,5 +36,23 @@ class DeployHandler(EndpointHandler):
             if not partial or not isinstance(partial, list):
                 raise cherrypy.HTTPError(status.BAD_REQUEST, ERR_BAD_PARTIAL)
 
-        jid = self.handle(targets, role, extra_vars, partial, run_async=True)
+        batch_size = cherrypy.request.json.pop('batch_size', None)
+        if batch_size is not None:
+            if isinstance(batch_size, str) and batch_size.endswith('%'):
+                _batch_size = batch_size[:-1]
+                valid = _batch_size.isdigit() and 0 < int(_batch_size) <= 100
+            else:
+                valid = (isinstance(batch_size, int) and
+                         not isinstance(batch_size, bool) and batch_size > 0)
+            if not valid:
+                raise cherrypy.HTTPError(status.BAD_REQUEST, ERR_BAD_BATCHSIZE)
+
+        max_fail = cherrypy.request.json.pop('max_fail_percentage', None)
+        if max_fail is not None:
+            if (not isinstance(max_fail, (int, float)) or
+                    isinstance(max_fail, bool) or not 0 <= max_fail <= 100):
+                raise cherrypy.HTTPError(status.BAD_REQUEST, ERR_BAD_MAXFAIL)
+
+        jid = self.handle(targets, role, extra_vars, partial,
+                          batch_size, max_fail, run_async=True)
         return api_response(status.CREATED, dict(jid=jid))
@@ -25,8 +25,9 @@ class ExecuteHandler(EndpointHandler):
         if not cmd or not isinstance(cmd, str):
             raise cherrypy.HTTPError(status.BAD_REQUEST, ERR_BAD_SERVPARAMS)
         cmd = unquote(cmd)
+        timeout = parse_params_pagination(params, 'timeout', ERR_BAD_TIMEOUT)
 
-        result = self.handle(target, cmd)
+        result = self.handle(target, cmd, timeout=timeout)
         if not result:
             raise cherrypy.HTTPError(status.NOT_FOUND, ERR_NO_MATCH)
         else:
@@ -44,5 +45,8 @@ class ExecuteHandler(EndpointHandler):
         if not cmd or not isinstance(cmd, str):
             raise cherrypy.HTTPError(status.BAD_REQUEST, ERR_BAD_ROLE)
 
-        jid = self.handle(targets, cmd, run_async=True)
+        stream = parse_params_bool(cherrypy.request.json, 'stream',
+                                   ERR_BAD_STREAM)
+
+        jid = self.handle(targets, cmd, run_async=True, stream=stream)
         return api_response(status.CREATED, dict(jid=jid))
@@ -2,6 +2,8 @@
 
 import cherrypy
 
+from .utils import *
+from .consts import *
 from .handler import CommonHandler
 
 from exe.runner import FacterRunner
@@ -12,3 +14,15 @@ class FacterHandler(CommonHandler):
     """ Endpoint Handler: ``/facter``. """
 
     __RUNNER__ = FacterRunner
+
+    @cherrypy.tools.json_out()
+    def GET(self, **params):
+        """ Gather facts of remote host (block mode), via the fact cache. """
+        target = parse_params_target(params)
+        refresh = parse_params_bool(params, 'refresh')
+        timeout = parse_params_pagination(params, 'timeout', ERR_BAD_TIMEOUT)
+        result, age = self.handle(target, refresh=refresh, timeout=timeout)
+        if not result:
+            raise cherrypy.HTTPError(status.NOT_FOUND, ERR_NO_MATCH)
+        cherrypy.serving.response.headers[API_AGE_HEADER] = str(age)
+        return api_response(status.OK, result)
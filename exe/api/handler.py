@@ -10,6 +10,8 @@ from exe.exc import JobConflictError
 from exe.exc import JobNotExistsError
 from exe.exc import JobNotSupportedError
 from exe.exc import JobDeleteError
+from exe.exc import JobQueryError
+from exe.exc import JobBusyError
 from exe.utils.err import excinst
 
 
@@ -36,7 +38,7 @@ class EndpointHandler(object):
         """
         try:
             return self._runner.handle(*args, **kwargs)
-        except JobDeleteError:
+        except (JobDeleteError, JobQueryError):
             raise cherrypy.HTTPError(status.BAD_REQUEST, excinst().message)
         except JobConflictError:
             raise cherrypy.HTTPError(status.CONFLICT, excinst().message)
@@ -45,6 +47,9 @@ class EndpointHandler(object):
                                      excinst().message)
         except (JobNotExistsError, ExecutorNoMatchError):
             raise cherrypy.HTTPError(status.NOT_FOUND, excinst().message)
+        except JobBusyError:
+            raise cherrypy.HTTPError(status.SERVICE_UNAVAILABLE,
+                                     excinst().message)
         except:
             cherrypy.log("error response 500", traceback=True)
             raise cherrypy.HTTPError(status.INTERNAL_SERVER_ERROR)
@@ -57,7 +62,8 @@ class CommonHandler(EndpointHandler):
     def GET(self, **params):
         """ Work on remote host (block mode). """
         target = parse_params_target(params)
-        result = self.handle(target)
+        timeout = parse_params_pagination(params, 'timeout', ERR_BAD_TIMEOUT)
+        result = self.handle(target, timeout=timeout)
         if not result:
             raise cherrypy.HTTPError(status.NOT_FOUND, ERR_NO_MATCH)
         else:
@@ -8,7 +8,7 @@ from .utils import *
 from .consts import *
 from .handler import EndpointHandler
 
-from exe.runner import JobQuerier
+from exe.runner import Job, JobQuerier
 
 
 @cherrypy.expose
@@ -18,14 +18,52 @@ class JobQueryHandler(EndpointHandler):
     __RUNNER__ = JobQuerier
 
     @cherrypy.tools.json_stream_output()
-    def GET(self, jid=None, **params):
-        """ List or gather job info. """
+    def GET(self, jid=None, resource=None, name=None, **params):
+        """ List or gather job info, or outputs of one host of job. """
         detail = parse_params_bool(params, 'detail')
         follow = parse_params_bool(params, 'follow')
         outputs = parse_params_bool(params, 'outputs')
+        progress = parse_params_bool(params, 'progress')
 
-        return api_response(status.OK,
-                            self.handle(jid, outputs, follow, detail))
+        if not jid:
+            limit  = parse_params_pagination(params, 'limit') or 0
+            since  = parse_params_pagination(params, 'since')
+            until  = parse_params_pagination(params, 'until')
+            cursor = params.pop('cursor', None)
+            operate = params.pop('operate', None)
+            state  = None
+            if 'state' in params:
+                state = parse_params_int(params, 'state')
+                if state not in Job.STATES:
+                    raise cherrypy.HTTPError(status.BAD_REQUEST, ERR_BAD_STATE)
+            host   = params.pop('host', None)
+
+            cursor, jobs = self.handle(detail=detail, limit=limit,
+                                       cursor=cursor, since=since, until=until,
+                                       operate=operate, state=state, host=host)
+            if cursor:
+                cherrypy.serving.response.headers[API_CURSOR_HEADER] = cursor
+            return api_response(status.OK, json_array_stream(jobs))
+
+        offset = parse_params_pagination(
+            params, 'offset', ERR_BAD_OUTPUTRANGE) or 0
+        limit  = parse_params_pagination(
+            params, 'limit', ERR_BAD_OUTPUTRANGE) or 0
+
+        if resource:    # /jobs/$jid/hosts/$fqdn
+            if resource != "hosts" or not name:
+                raise cherrypy.HTTPError(status.NOT_FOUND, ERR_NO_RESOURCE)
+            full = parse_params_bool(params, 'full')
+            return api_response(status.OK, self.handle(
+                jid, host=name, offset=offset, limit=limit, full=full))
+
+        hosts = parse_params_list(params, 'hosts')
+        start = params.pop('from', None)
+        return api_response(status.OK, self.handle(jid, outputs, follow,
+                                                   detail, start=start,
+                                                   progress=progress,
+                                                   hosts=hosts, offset=offset,
+                                                   limit=limit))
 
     @cherrypy.tools.json_out()
     def DELETE(self, jid=None):
@@ -40,7 +40,7 @@ class APIServer(object):
     def __init__(self):
         """ Initialize APIServer instance. """
         try:
-            self._cfg = CONF.api_server
+            self._cfg = CONF.api
             self._cfg.merge(API_SERVER_DEFAULT_CONF)
         except ConfigError:
             self._cfg = ModuleOpts("", API_SERVER_DEFAULT_CONF)
@@ -73,7 +73,7 @@ class APIServer(object):
             # Server Opts #
             'server.socket_host': self._cfg.listen_addr,
             'server.socket_port': self._cfg.listen_port,
-            'server.thread_pool': 10,
+            'server.thread_pool': self._cfg.thread_pool,
             'engine.autoreload.on': False,
             # Log Opts #
             'log.screen': False,
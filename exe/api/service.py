@@ -42,8 +42,10 @@ class ServiceHandler(EndpointHandler):
         name = name.lower()
         start, restart = _state_parse(state)
         graceful = parse_params_bool(params, 'graceful')
+        timeout = parse_params_pagination(params, 'timeout', ERR_BAD_TIMEOUT)
 
-        result = self.handle(target, name, start, restart, graceful)
+        result = self.handle(target, name, start, restart, graceful,
+                             timeout=timeout)
         if not result:
             raise cherrypy.HTTPError(status.NOT_FOUND, ERR_NO_MATCH)
         else:
@@ -24,5 +24,11 @@ class TargetHandler(EndpointHandler):
         if pattern == None:
             pattern = '*'
         pattern = unquote(pattern)
-
-        return api_response(status.OK, self.handle(pattern))
+        offset = parse_params_pagination(
+            params, 'offset', ERR_BAD_OUTPUTRANGE) or 0
+        limit  = parse_params_pagination(
+            params, 'limit', ERR_BAD_OUTPUTRANGE) or 0
+
+        total, targets = self.handle(pattern, offset=offset, limit=limit)
+        cherrypy.serving.response.headers[API_TOTAL_HEADER] = str(total)
+        return api_response(status.OK, targets)
@@ -58,7 +58,10 @@ def _json_stream_output(next_handler, *args, **kwargs):
         response.stream = True
         def _stream_outputs():
             for _content in outputs:
-                yield json.dumps(_content).encode('utf-8')
+                if isinstance(_content, bytes): # already encoded
+                    yield _content
+                else:
+                    yield json.dumps(_content).encode('utf-8')
         return _stream_outputs()
     else:
         return json.dumps(outputs).encode('utf-8')
@@ -82,19 +85,30 @@ def parse_params_target(params):
     """ Get the ``target`` from request params or raise http 400 error. """
     try:
         targets = params.pop('target')
-        if not isinstance(target, list):
+        if not targets or not isinstance(targets, (str, list)):
             raise KeyError
         return targets
     except KeyError:
         raise cherrypy.HTTPError(status.BAD_REQUEST, ERR_NO_TARGET)
 
 
-def parse_params_bool(params, p):
-    """ Get and parse a boolean value from request params. """
+def parse_params_bool(params, p, errmsg=None):
+    """ Get and parse a boolean value from request params.
+
+    Values other than ``yes/1/true`` are ``False``, if ``errmsg`` given,
+    values which are not ``no/0/false`` either raise http 400 error.
+    """
     val = params.pop(p, None)
-    if not val:
+    if isinstance(val, bool):   # from json request body
+        return val
+    if val is None or val == "":
         return False
-    return val.lower() in ("yes", "1", "true")
+    val = str(val).lower()
+    if val in ("yes", "1", "true"):
+        return True
+    if errmsg != None and val not in ("no", "0", "false"):
+        raise cherrypy.HTTPError(status.BAD_REQUEST, errmsg)
+    return False
     
 
 def parse_params_int(params, p):
@@ -102,8 +116,38 @@ def parse_params_int(params, p):
     val = params.pop(p, None)
     try:
         return int(val, 10)
-    except ValueError:
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_params_pagination(params, p, errmsg=ERR_BAD_PAGINATION):
+    """ Get and parse an optional non-negative int value for pagination. """
+    if p not in params:
+        return None
+    val = parse_params_int(params, p)
+    if val is None or val < 0:
+        raise cherrypy.HTTPError(status.BAD_REQUEST, errmsg)
+    return val
+
+
+def parse_params_list(params, p):
+    """ Get and parse a list of strings (comma separated) from request params. """
+    val = params.pop(p, None)
+    if not val:
         return None
+    if not isinstance(val, list):
+        val = [val]
+    return [ v for _val in val for v in _val.split(',') if v ]
+
+
+def json_array_stream(items):
+    """ Encode ``items`` as JSON array piece by piece for output in stream mode. """
+    yield b'['
+    for idx, item in enumerate(items):
+        if idx:
+            yield b','
+        yield json.dumps(item).encode('utf-8')
+    yield b']'
 
 
 def api_response(status, body):
@@ -6,6 +6,7 @@ class ExeError(Exception):
     """ Base exception for all errors raised from EXE code """
 
     def __init__(self, message=""):
+        super(ExeError, self).__init__(message)  # keep message after pickle
         self.message = message
 
     def __str__(self):
@@ -37,6 +38,14 @@ class JobDeleteError(ExeError):
     pass
 
 
+class JobQueryError(ExeError):
+    pass
+
+
+class JobBusyError(ExeError):
+    pass
+
+
 ## TaskRunner Errors ##
 class TaskNotSupportedError(ExeError):
     pass
@@ -55,6 +64,10 @@ class ExecutorDeployError(ExeError):
     pass
 
 
+class ExecutorTimeoutError(ExeError):
+    pass
+
+
 ## Task Errors ##
 class TaskPrepareError(ExeError):
     pass
@@ -2,34 +2,45 @@
 
 import os
 import sys
-import copy
 import json
 import time
+import shlex
+import select
+import signal
 import logging
 import os.path
-import multiprocessing
+import threading
+import collections
 
+from ansible import constants as C
 from ansible.cli import CLI
 from ansible.cli.adhoc import AdHocCLI
 from ansible.cli.playbook import PlaybookCLI
 from ansible.playbook import Playbook
-from ansible.playbook.play import Play
-from ansible.playbook.task import Task
 from ansible.plugins.callback import CallbackBase
 from ansible.executor.task_queue_manager import TaskQueueManager
 from ansible.executor.playbook_executor import PlaybookExecutor
 from ansible.executor.task_result import TaskResult
-from ansible.executor.stats import AggregateStats
 from ansible.errors import AnsibleError
+from ansible.utils.vars import load_extra_vars, load_options_vars
+from ansible.vars.manager import VariableManager
 
 from billiard import current_process as billiard_current_process
 
 from .consts import *
 from .prototype import ExecutorPrototype
+from ._ansible_cache import InventoryCache, PlaybookCache
+from ._ansible_cache import INVENTORY_TTL, PATTERN_CACHE_SIZE
+from ._ansible_pool import ZygotePool
+from ._ansible_facts import ExeFactCache
+from ._ansible_watchdog import TaskWatchdog, task_timed_out
+from ._ansible_channel import *
 
 from exe.utils.err import excinst
 from exe.utils.path import make_abs_path
+from exe.utils.facts import FACTS_TTL, FACTS_MAX_AGE
 from exe.exc import ExecutorPrepareError, ExecutorDeployError, ExecutorNoMatchError
+from exe.exc import ExecutorTimeoutError
 
 
 LOG = logging.getLogger(__name__)
@@ -37,159 +48,313 @@ LOG = logging.getLogger(__name__)
 
 ## ansible reaper ##
 class AnsibleReaper(CallbackBase):
-    """ Ansible reaper for result collect, act as Ansible Callback. """
+    """ Ansible reaper for result collect, act as Ansible Callback.
+
+    The reaper instance works on both side of ``fork()``, callback methods
+    run inside the child process (or the pool worker), which encode each
+    ansible event into a compact event (see ``_ansible_channel``) contains
+    only fields used by the parent side, and send it through the channel,
+    ``reaper_returns`` runs inside the parent process and yield outputs.
+
+    Return data of each host only contains keys inside ``fields`` (and the
+    ``msg`` key for error report) if given, otherwise all of them except
+    those ansible internal keys (``_ansible_*``).
+
+    The whole run should be done before ``deadline`` (timestamp, ``None``
+    for no limit, which is ``timeout`` seconds after the executor bound),
+    otherwise the process group of ansible will be killed, hosts which
+    have not returned from the current task are yield with ``EXE_TIMEOUT``
+    state, and then ``ExecutorTimeoutError`` raised. Hosts whose task was
+    ended by ``TaskWatchdog`` are yield with ``EXE_TIMEOUT`` state too,
+    without affect the others.
+    """
 
     # Ansible Callback Plugin API
     CALLBACK_VERSION = 2.0
     CALLBACK_TYPE = 'stdout'
     CALLBACK_NAME = 'exe_reaper'
 
-    def __init__(self, hosts=None, skip_announce=True):
+    def __init__(self, hosts=None, skip_announce=True,
+                 channel=None, fields=None, timeout=0, deadline=None):
         self._reaper_targets = hosts
         self._reaper_announce = not skip_announce
+        self._reaper_fields = None if fields == None else set(
+            fields).union(['msg'])
 
         # initialized by first reaper event
         self._reaper_name = None
         self._reaper_hosts = None
         self._reaper_tasks_ctx = None
+        self._reaper_index = None   # target -> bit index of task host bitmap
         self._reaper_start_timestamp = 0
 
+        # set by the ``EVENT_STATS`` event (the last reaper event)
+        self._reaper_stats = None
+
+        # deadline of the whole run
+        self._reaper_timeout = timeout
+        self._reaper_deadline = deadline
+
         self._reaper_initialized = False
+        self._reaper_done = False
 
-        # ansible run jobs after `fork()` workers,
-        #   multiprocessing will make those control vars synced
-        self._reaper_queue = multiprocessing.Queue()
-        self._reaper_done_ev = multiprocessing.Event()
+        # ansible run jobs after `fork()` workers, events are sent
+        #   through the pipe created before `fork()`, pool workers of
+        #   ``ZygotePool`` use their own channel
+        self._reaper_forked = channel == None
+        self._reaper_queue = FrameChannel.pipe() if channel == None else channel
 
     # Executor Internal Reaper API #
-    def reaper_await(self):
-        """ Await Exit event.
-
-        Sometime the child process may exit before ansible callback
-        ``v2_playbook_on_stats`` returns, we use this method to block
-        child process until the parent reaper instance reap everything.
+    @property
+    def reaper_stats(self):
+        """ Stats summary of each host, available after reaper returns. """
+        return self._reaper_stats
+
+    @property
+    def reaper_done(self):
+        """ ``True`` after the last event of the run was handled. """
+        return self._reaper_done
+
+    def reaper_fileno(self):
+        """ The read side fd of the channel, for ``select()``. """
+        return self._reaper_queue.fileno()
+
+    def reaper_parent(self):
+        """ Keep the read side of the pipe only, invoked by parent process. """
+        if self._reaper_forked:
+            self._reaper_queue.close_write()
+
+    def reaper_child(self):
+        """ Keep the write side of the pipe only, invoked by child process. """
+        if self._reaper_forked:
+            self._reaper_queue.close_read()
+
+    def reaper_close(self):
+        """ Close the pipe, invoked by child process before exit.
+
+        Events are written synchronously, after that the parent reaper
+        reads the remaining events and then gets EOF.
         """
-        self._reaper_done_ev.wait()
+        if self._reaper_forked:
+            self._reaper_queue.close()
 
     def reaper_exception(self, exc):
         """ Reaper Exception raised by child process. """
-        self._reaper_queue.put(exc)
+        self._reaper_queue.put([EVENT_ERROR, str(exc)])
+
+    def reaper_returns(self, pid, cleanup=None):
+        """ Yield ansible outputs to the outside through the reaper instance.
 
-    def reaper_returns(self, pid):
-        """ Yield ansible outputs to the outside through the reaper instance. """
+        When ``cleanup`` given, it will be called instead of reap the child
+        process after reaper returns, e.g.: release the pool worker.
+        """
         LOG.debug("starting reaper for pid {0}".format(pid))
+        self.reaper_parent()
 
         try:
-            while True:
-                LOG.debug("reaper block, waiting message from "
-                          "pid {0}".format(pid))
-                _event = self._reaper_queue.get()
-
-                LOG.debug("reaper got event <{0}> from "
-                          "pid {1}".format(_event, pid))
-                # riase the internal exception which wrapped
-                #   by the `try/except` block inside both
-                #   `self.execute` and `self.deploy`.
-                if isinstance(_event, Exception):
-                    raise _event
-
-                # the first event after start, the ``_event`` shuld be an
-                #   instance of ``ansible.playbook.Play``, after that the
-                #   reaper was fully initialized
-                if not self._reaper_initialized:
-                    if not isinstance(_event, Play):
-                        raise ExecutorPrepareError(
-                            "cannot initialize ansible reaper instance "
-                            "after fork()")
-                    self._set_reaper_ctx(_event)
-
-                    LOG.debug(
-                        "callback method <v2_playbook_on_play_start> runs, "
-                        "set reaper context with empty tasks list, "
-                        "name: <{0}>, hosts: <{1}>, start: <{2}> ".format(
-                            self._reaper_name, self._reaper_hosts,
-                            self._reaper_start_timestamp))
-
-                    if self._reaper_announce:
-                        yield self._new_reaper_event(self._reaper_name)
-                    continue
-
-                # the task start event
-                if isinstance(_event, Task):
-                    self._append_reaper_task_ctx(_event)
-
-                    LOG.debug("callback method <v2_playbook_on_task_start> or "
-                        "<v2_playbook_on_handler_task_start> runs, append task"
-                        " context to reaper: <{0}>".format(
-                            self._reaper_tasks_ctx[-1]))
-                    if self._reaper_announce:
-                        yield self._new_reaper_event(
-                            self._reaper_tasks_ctx[-1]['name'])
-                    continue
-
-                # the wrapped runner return event
-                if isinstance(_event, tuple):
-                    _type    = _event[0]
-                    _payload = _event[1]
-
-                    self._reaper_tasks_ctx[-1][_type].append(_payload)
-
-                    LOG.debug("callback method <v2_runner_on_*> or "
-                              "<v2_runner_item_on_*> runs, append task context"
-                              " to reaper: <{0}>".format(
-                                  self._reaper_tasks_ctx[-1]))
-                    yield copy.deepcopy(_payload); continue
-
-                # the statistics of this play run after all, after that
-                #   the reaper should exit
-                if isinstance(_event, AggregateStats):
-                    _summary_dict = {}
-                    for target in self._reaper_targets:
-                        _summary_dict[target] = _event.summarize(target)
-
-                    # operate finished, make sure everything was runned
-                    #   on all remote host(s)
-                    for task_context in self._reaper_tasks_ctx:
-                        if len(self._reaper_targets) != len(task_context['hosts']):
-                            _hosts = [ tuple(t.keys())[0]
-                                for t in task_context['hosts'] ]
-                            _missing = [ t for t in self._reaper_targets
-                                if t not in _hosts ]
-
-                            raise ExecutorNoMatchError(
-                                "target not found: <{0}>".format(
-                                    ",".join(_missing)))
-
-                    LOG.debug("callback method <v2_playbook_on_stats> runs, "
-                              "going to return from reaper, stats summary: "
-                              "<{0}>".format(_summary_dict))
-                    break
-
+            while not self._reaper_done:
+                wait = self.reaper_wait()
+                if wait != None and not select.select(
+                        [self.reaper_fileno()], [], [], wait)[0]:
+                    errmsg, outputs = self.reaper_expire(pid)
+                    for _out in outputs:
+                        yield _out
+                    raise ExecutorTimeoutError(errmsg)
+
+                _out = self.reaper_read(pid)
+                if _out != None:
+                    yield _out
         finally:
-            LOG.debug("reaper cleanup pid {0}".format(pid))
-            self._reaper_queue.close()
-            self._reaper_done_ev.set()
+            self.reaper_cleanup(pid, cleanup)
+
+    def reaper_wait(self):
+        """ Seconds before the deadline, ``None`` for no deadline. """
+        if self._reaper_deadline == None:
+            return None
+        return max(self._reaper_deadline - time.time(), 0)
+
+    def reaper_expire(self, pid):
+        """ Kill the ansible process group after the deadline passed.
+
+        Return the error message and outputs of hosts which have not
+        returned from the current task (``EXE_TIMEOUT`` state).
+        """
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:     # already gone
+            pass
+        self._reaper_done = True
+
+        name = self._reaper_name
+        pending = self._reaper_targets
+        if self._reaper_tasks_ctx:
+            name = self._reaper_tasks_ctx[-1]['name']
+            pending = self._missing_reaper_hosts(
+                self._reaper_tasks_ctx[-1]['hosts'])
+
+        errmsg = "ansible run timed out after <{0}> seconds".format(
+            self._reaper_timeout)
+        LOG.warning("{0}, ansible process <{1}> killed, pending host(s): "
+                    "<{2}>".format(errmsg, pid, ",".join(pending)))
+
+        outputs = []
+        for target in pending:
+            outputs.append({
+                target: {
+                    EXE_NAME_ATTR: name,
+                    EXE_STATUS_ATTR: EXE_TIMEOUT,
+                    EXE_RETURN_ATTR: {'msg': errmsg},
+                }
+            })
+        return errmsg, outputs
+
+    def reaper_read(self, pid):
+        """ Read and handle the next event, return the output or ``None``.
+
+        The ``reaper_done`` will be ``True`` after the last event handled.
+        """
+        LOG.debug("reaper block, waiting message from pid {0}".format(pid))
+        try:
+            _type, _payload = self._reaper_queue.get()
+        except EOFError:
+            raise ExecutorPrepareError(
+                "ansible process <{0}> exited unexpectedly".format(pid))
+
+        LOG.debug("reaper got event <{0}> from pid {1}".format(_type, pid))
+        # riase the internal exception which wrapped
+        #   by the `try/except` block inside both
+        #   `self.execute` and `self.deploy`.
+        if _type == EVENT_ERROR:
+            raise ExecutorPrepareError(_payload)
+
+        # the pool worker finished current work without any
+        #   statistics, e.g.: nothing to do
+        if _type == EVENT_END:
+            self._reaper_done = True
+            return None
+
+        # the first event after start, the ``_type`` shuld be the
+        #   ``EVENT_PLAY``, after that the reaper was fully
+        #   initialized
+        if not self._reaper_initialized:
+            if _type != EVENT_PLAY:
+                raise ExecutorPrepareError(
+                    "cannot initialize ansible reaper instance after fork()")
+            self._set_reaper_ctx(_payload)
+
+            LOG.debug(
+                "callback method <v2_playbook_on_play_start> runs, "
+                "set reaper context with empty tasks list, "
+                "name: <{0}>, hosts: <{1}>, start: <{2}> ".format(
+                    self._reaper_name, self._reaper_hosts,
+                    self._reaper_start_timestamp))
+
+            if self._reaper_announce:
+                return self._new_reaper_event(self._reaper_name)
+            return None
+
+        # the task start event
+        if _type == EVENT_TASK:
+            self._append_reaper_task_ctx(_payload)
+
+            LOG.debug("callback method <v2_playbook_on_task_start> or "
+                "<v2_playbook_on_handler_task_start> runs, append task"
+                " context to reaper: <{0}>".format(
+                    self._reaper_tasks_ctx[-1]['name']))
+            if self._reaper_announce:
+                return self._new_reaper_event(
+                    self._reaper_tasks_ctx[-1]['name'])
+            return None
+
+        # the runner return event, each of them was decoded into
+        #   a new object, return it without copy
+        if _type in (EVENT_HOSTS, EVENT_ITEMS):
+            self._update_reaper_task_ctx(_type, next(iter(_payload)))
+
+            LOG.debug("callback method <v2_runner_on_*> or "
+                      "<v2_runner_item_on_*> runs, update task "
+                      "context of reaper: <{0}>".format(
+                          self._reaper_tasks_ctx[-1]['name']))
+            return _payload
+
+        # the statistics of this play run after all, after that
+        #   the reaper should exit
+        if _type == EVENT_STATS:
+            # operate finished, make sure everything was runned
+            #   on all remote host(s)
+            for task_context in self._reaper_tasks_ctx:
+                if len(self._reaper_index) != task_context['done']:
+                    _missing = self._missing_reaper_hosts(
+                        task_context['hosts'])
+
+                    raise ExecutorNoMatchError(
+                        "target not found: <{0}>".format(",".join(_missing)))
+
+            LOG.debug("callback method <v2_playbook_on_stats> runs, "
+                      "going to return from reaper, stats summary: "
+                      "<{0}>".format(_payload))
+            self._reaper_stats = _payload
+            self._reaper_done = True
+        return None
+
+    def reaper_cleanup(self, pid, cleanup=None):
+        """ Reap the child process (or call ``cleanup``) after reaper returns. """
+        LOG.debug("reaper cleanup pid {0}".format(pid))
+        if cleanup != None:
+            cleanup()
+        else:
+            # never block the child by a full pipe
+            self._reaper_queue.close_read()
             os.waitpid(pid, 0)
 
     def _set_reaper_ctx(self, play):
         """ Handle new play start. """
-        self._reaper_name  = play.get_name()            # play name
-        self._reaper_hosts = play.hosts                 # play hosts
+        self._reaper_name  = play['name']               # play name
+        self._reaper_hosts = play['hosts']              # play hosts
         self._reaper_start_timestamp = int(time.time()) # play start timestamp
 
         self._reaper_tasks_ctx = [] # play tasks
+        self._reaper_index = dict([ (target, idx) for idx, target
+                                    in enumerate(self._reaper_targets) ])
         self._reaper_initialized = True
 
     def _append_reaper_task_ctx(self, task):
-        """ Handle new task start. """
+        """ Handle new task start.
+
+        Instead of keep host payloads, each task context only keeps a host
+        bitmap (one bit per target) and counters, which keeps the memory
+        of reaper flat no matter how many tasks or hosts there are.
+        """
         self._reaper_tasks_ctx.append(dict(
-            name    = task.get_name(),   # task name
-            path    = task.get_path(),   # task line number in playbooks
-            tags    = task.tags,         # task tags
-            items   = [],                # task items
-            hosts   = [],                # task host states
+            name    = task['name'],      # task name
+            path    = task['path'],      # task line number in playbooks
+            tags    = task['tags'],      # task tags
+            items   = 0,                 # task item returns count
+            hosts   = bytearray(         # task hosts bitmap
+                (len(self._reaper_targets) + 7) // 8),
+            done    = 0,                 # task hosts count
             start   = int(time.time()))) # task start timestamp
 
+    def _update_reaper_task_ctx(self, _type, host):
+        """ Handle new task or item return of host. """
+        task_context = self._reaper_tasks_ctx[-1]
+        if _type == EVENT_ITEMS:
+            task_context['items'] += 1
+            return
+
+        idx = self._reaper_index.get(host)
+        if idx == None:     # not one of targets, e.g.: delegated host
+            return
+        byte, bit = idx >> 3, 1 << (idx & 7)
+        if not task_context['hosts'][byte] & bit:
+            task_context['hosts'][byte] |= bit
+            task_context['done'] += 1
+
+    def _missing_reaper_hosts(self, bitmap):
+        """ Return targets whose bit not set inside task hosts bitmap. """
+        return [ target for idx, target in enumerate(self._reaper_targets)
+                 if not bitmap[idx >> 3] & (1 << (idx & 7)) ]
+
     def _new_reaper_event(self, name, status=EXE_ANNOUNCE,
                           result=None, summary=None):
         """ Wrap the ansible result inside reaper event. """
@@ -198,7 +363,7 @@ class AnsibleReaper(CallbackBase):
 
         if result:
             _host   = result._host.get_name()
-            _result = result._result.copy()
+            _result = self._reaper_result(result._result)
         elif summary:
             _host   = EXE_ANNOUNCE_SUMMARY_ATTR
             _result = summary
@@ -211,17 +376,25 @@ class AnsibleReaper(CallbackBase):
             }
         }
 
+    def _reaper_result(self, result):
+        """ Pick fields used by parent side from the ansible result. """
+        if self._reaper_fields != None:
+            return dict([ (k, result[k])
+                          for k in self._reaper_fields if k in result ])
+        return dict([ (k, v) for k, v in result.items()
+                      if not k.startswith('_ansible') ])
+
     def _update_reaper_task_state(self, status, result):
         """ Handle new task return of each host. """
         self._reaper_queue.put(
-            ('hosts', self._new_reaper_event(
-                result.task_name, status, result)))
+            [EVENT_HOSTS, self._new_reaper_event(
+                result.task_name, status, result)])
 
     def _update_reaper_item_state(self, status, result):
         """ Handle new item return of each task of each host. """
         self._reaper_queue.put(
-            ('items', self._new_reaper_event(
-                result.task_name, status, result)))
+            [EVENT_ITEMS, self._new_reaper_event(
+                result.task_name, status, result)])
 
     # Ansible Callback Plugin API Implementations #
     def v2_playbook_on_start(self, playbook):
@@ -230,19 +403,28 @@ class AnsibleReaper(CallbackBase):
 
     def v2_playbook_on_stats(self, stats):
         """ The last one of all callback methods, indicates everything was done. """
-        self._reaper_queue.put(stats)
+        self._reaper_queue.put(
+            [EVENT_STATS, dict([ (target, stats.summarize(target))
+                                 for target in self._reaper_targets ])])
 
     def v2_playbook_on_play_start(self, play):
         """ CLI output: <PLAY [...] *************> (the first one). """
-        self._reaper_queue.put(play)
+        self._reaper_queue.put(
+            [EVENT_PLAY, dict(name=play.get_name(), hosts=play.hosts)])
 
     def v2_playbook_on_task_start(self, task, is_conditional):
         """ CLI output: <TASK [Gathering Facts] *************> (at each task starts). """
-        self._reaper_queue.put(task)
+        self._put_reaper_task(task)
 
     def v2_playbook_on_handler_task_start(self, task):
         """ CLI output: <RUNNING HANDLER [...] *************> (at each handler task starts). """
-        self._reaper_queue.put(task)
+        self._put_reaper_task(task)
+
+    def _put_reaper_task(self, task):
+        """ Send task start event. """
+        self._reaper_queue.put(
+            [EVENT_TASK, dict(name=task.get_name(), path=task.get_path(),
+                              tags=task.tags)])
 
     def v2_runner_on_ok(self, result):
         """ CLI output: <ok: [...]> (at each task of each host return). """
@@ -254,7 +436,9 @@ class AnsibleReaper(CallbackBase):
 
     def v2_runner_on_failed(self, result, ignore_errors=False):
         """ CLI output: <failed: [...]> (at each task of each host return). """
-        self._update_reaper_task_state(EXE_FAILED, result)
+        self._update_reaper_task_state(
+            EXE_TIMEOUT if task_timed_out(result._result) else EXE_FAILED,
+            result)
 
     def v2_runner_on_unreachable(self, result):
         """ CLI output: <unreachable: [...]> (at each task of each host return). """
@@ -272,6 +456,85 @@ class AnsibleReaper(CallbackBase):
         """ CLI output: <failed: [...] => (item=...)> (at each item of each task of each host return). """
         self._update_reaper_item_state(EXE_FAILED, result)
 
+## ansible shard reaper ##
+class AnsibleShardReaper(object):
+    """ Merge reapers of host shards, each of them runs by its own process.
+
+    Events of all shards are read once their pipe got readable, so the
+    slower shards never block the others, host returns are yield as they
+    are, announces (play and task names) are the same for each shard and
+    only yield once, by the first shard reached them, each announce is
+    identified by its name and the ordinal of that name inside the shard
+    (the same task may run more than once, e.g.: included twice), shards
+    which skipped some tasks never shadow the others.
+    """
+
+    def __init__(self, shards):
+        """ Initialize AnsibleShardReaper with ``(pid, reaper)`` pairs. """
+        self._shards = shards
+        self._stats = None
+
+    @property
+    def reaper_stats(self):
+        """ Stats summary of each host of all shards. """
+        return self._stats
+
+    def reaper_returns(self):
+        """ Yield ansible outputs of all shards. """
+        pending = dict([ (reaper.reaper_fileno(), (pid, reaper))
+                         for pid, reaper in self._shards ])
+        announced = set()   # ``(name, ordinal)`` of announces yielded
+        ordinals = dict([ (fd, collections.Counter()) for fd in pending ])
+        stats = {}
+        errors = []
+
+        try:
+            while pending:
+                waits = [ reaper.reaper_wait() for _, reaper
+                          in pending.values() ]
+                waits = [ wait for wait in waits if wait != None ]
+                readable, _, _ = select.select(
+                    list(pending), [], [], min(waits) if waits else None)
+
+                # shards passed their deadline without any event, the
+                #   other shards keep running
+                for fd in list(pending):
+                    pid, reaper = pending[fd]
+                    if fd in readable or reaper.reaper_wait() != 0:
+                        continue
+                    del pending[fd]
+                    errmsg, outputs = reaper.reaper_expire(pid)
+                    reaper.reaper_cleanup(pid)
+                    errors.append(errmsg)
+                    for _out in outputs:
+                        yield _out
+
+                for fd in readable:
+                    pid, reaper = pending[fd]
+                    _out = reaper.reaper_read(pid)
+                    if reaper.reaper_done:
+                        del pending[fd]
+                        stats.update(reaper.reaper_stats or {})
+                        reaper.reaper_cleanup(pid)
+                    if _out == None:
+                        continue
+
+                    if EXE_ANNOUNCE_ATTR in _out:
+                        name = _out[EXE_ANNOUNCE_ATTR].get(EXE_NAME_ATTR)
+                        ordinals[fd][name] += 1
+                        identity = (name, ordinals[fd][name])
+                        if identity in announced:
+                            continue
+                        announced.add(identity)
+                    yield _out
+            self._stats = stats
+            if errors:
+                raise ExecutorTimeoutError("; ".join(sorted(set(errors))))
+        finally:
+            for pid, reaper in pending.values():
+                reaper.reaper_cleanup(pid)
+
+
 ## ansible executor ##
 class AnsibleExecutor(ExecutorPrototype):
     """ Executor implemented on top of ansible's CLI classes.
@@ -297,10 +560,105 @@ class AnsibleExecutor(ExecutorPrototype):
     ROLE_VAR = "_role"
     TARGET_VAR = "_targets"
 
+    # fields of return data used by each operation, see ``AnsibleReaper``
+    CMD_FIELDS = ("stdout", "stderr", "rc")
+    FACTER_FIELDS = ("ansible_facts",)
+    DEPLOY_FIELDS = ()      # only ``msg`` for ``extract_return_error``
+
+    SHARD_MIN_HOSTS = 16    # min hosts of each shard, see ``shards``
+
+    # shell scripts of ``stream_execute``, outputs of command are written
+    #   into files of a private remote directory created by ``mktemp -d``,
+    #   which is passed to polls via the ``STREAM_VAR`` extra var and
+    #   refused unless it is a real directory owned by the remote user
+    STREAM_VAR = "_exe_stream"
+    STREAM_INTERVAL = 2     # seconds between two polls
+    STREAM_CHUNK = 65536    # max bytes of stdout/stderr shipped by each poll
+    STREAM_KILL_TIMEOUT = 30    # seconds of the kill after the deadline
+    STREAM_DIR = "{{ " + STREAM_VAR + "[inventory_hostname] | quote }}"
+    STREAM_CHECK = (
+        "case \"$d\" in /*/exe-stream.??????????) ;; *) d=; esac; "
+        "[ -d \"$d\" ] && [ ! -L \"$d\" ] && [ -O \"$d\" ] || "
+        "{ echo \"bad stream directory <$d>\" >&2; exit 1; }; ")
+    STREAM_START = (
+        "d=$(mktemp -d \"${{TMPDIR:-/tmp}}/exe-stream.XXXXXXXXXX\") || "
+        "exit 1; " + STREAM_CHECK.replace("{", "{{").replace("}", "}}") +
+        "chmod 700 \"$d\" && : > \"$d/stdout\" && : > \"$d/stderr\" || "
+        "exit 1; "
+        "$(command -v setsid) nohup sh -c {wrapper} sh \"$d\" "
+        "> /dev/null 2>&1 < /dev/null & echo $! > \"$d/pid\"; echo \"$d\"")
+    STREAM_WRAPPER = (
+        "sh -c {cmd} > \"$1/stdout\" 2> \"$1/stderr\" < /dev/null; "
+        "echo $? > \"$1/rc.tmp\" && mv \"$1/rc.tmp\" \"$1/rc\"")
+    STREAM_POLL = (     # the chunk size ``c`` is prepended
+        "d=" + STREAM_DIR + "; " + STREAM_CHECK + "cd \"$d\" || exit 1; "
+        "o=$(cat stdout.pos 2> /dev/null || echo 0); "
+        "e=$(cat stderr.pos 2> /dev/null || echo 0); "
+        "tail -c +$((o + 1)) stdout | head -c $c > stdout.chunk; "
+        "tail -c +$((e + 1)) stderr | head -c $c > stderr.chunk; "
+        "o=$((o + $(wc -c < stdout.chunk))); "
+        "e=$((e + $(wc -c < stderr.chunk))); "
+        "echo $o > stdout.pos; echo $e > stderr.pos; "
+        "if [ -f rc ] && [ $o -ge $(wc -c < stdout) ] && "
+        "[ $e -ge $(wc -c < stderr) ]; then s=\"done $(cat rc)\"; "
+        "else s=running; fi; "
+        "echo \"$s\"; cat stdout.chunk; printf .; "
+        "cat stderr.chunk >&2; printf . >&2; "
+        "case \"$s\" in done*) cd / && rm -rf \"$d\";; esac")
+    STREAM_KILL = (
+        "d=" + STREAM_DIR + "; " + STREAM_CHECK +
+        "p=$(cat \"$d/pid\"); case \"$p\" in ''|*[!0-9]*) ;; *) "
+        "kill -- -\"$p\" 2> /dev/null || kill \"$p\" 2> /dev/null;; esac; "
+        "rm -rf \"$d\"")
+
+    _inventory_cache = None
+    _inventory_cache_lock = threading.Lock()
+
+    _playbooks_cache = None
+    _playbooks_cache_lock = threading.Lock()
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
     def __init__(self, hosts=[], timeout=0, concurrency=0,
-                 workdir=os.getcwd(), playbooks=None):
-        """ Initialize AnsibleExecutor instance. """
+                 workdir=os.getcwd(), playbooks=None,
+                 inventory_ttl=INVENTORY_TTL,
+                 target_cache_size=PATTERN_CACHE_SIZE, pool_size=0,
+                 shards=1, fact_cache="", fact_cache_timeout=FACTS_MAX_AGE,
+                 fact_cache_ttl=FACTS_TTL, task_timeout=0):
+        """ Initialize AnsibleExecutor instance.
+
+        With ``shards`` > 1, hosts of each run are split into at most
+        ``shards`` shards (each of them has ``SHARD_MIN_HOSTS`` hosts at
+        least), each shard runs by its own forked ansible process with
+        ``concurrency / shards`` forks, outputs of them are merged.
+
+        With ``fact_cache`` (redis url), deploy gathers facts in ``smart``
+        mode, facts younger than ``fact_cache_timeout`` seconds inside the
+        fact cache are used instead of gather them again.
+
+        All runs of the bound executor should be done within ``timeout``
+        seconds after it bound (see ``AnsibleReaper``), and each task of
+        each host should be done within ``task_timeout`` seconds (see
+        ``TaskWatchdog``), ``0`` for no limit.
+        """
         self._workdir = make_abs_path(workdir)
+        self._fact_cache = fact_cache
+
+        try:
+            self._inventory_ttl = int(inventory_ttl)
+            self._target_cache_size = int(target_cache_size)
+            self._pool_size = int(pool_size)
+            self._shards = int(shards)
+            self._fact_cache_timeout = int(fact_cache_timeout)
+            self._fact_cache_ttl = int(fact_cache_ttl)
+            self._task_timeout = int(task_timeout)
+            timeout = int(timeout or 0)
+        except ValueError:
+            raise ExecutorPrepareError(
+                "bad inventory_ttl, target_cache_size, pool_size, shards, "
+                "fact_cache_timeout, fact_cache_ttl, timeout or "
+                "task_timeout given")
 
         self._playbooks_path = make_abs_path(
             playbooks if playbooks else self.PLAYBOOKS, self._workdir)
@@ -319,6 +677,7 @@ class AnsibleExecutor(ExecutorPrototype):
             "playbooks path <{1}>, concurrency <{2}>".format(
                 self._workdir, self._playbooks_path, concurrency))
         super(AnsibleExecutor, self).__init__(hosts, timeout, concurrency)
+        self._reaper = None     # reaper of the last run
 
     def _disable_daemonic(self):
         """ Disable the ``daemonic`` flag of the current process.
@@ -342,49 +701,129 @@ class AnsibleExecutor(ExecutorPrototype):
         """
         billiard_current_process()._config['daemon'] = False
 
+    def bind(self, hosts, timeout=None):
+        """ Return a copy of this executor on ``hosts``, see ``ExecutorPrototype``. """
+        executor = super(AnsibleExecutor, self).bind(hosts, timeout)
+        executor._reaper = None
+        return executor
+
+    @property
+    def stats(self):
+        """ Stats summary of ``AggregateStats`` of the last run. """
+        if self._reaper == None:
+            return None
+        return self._reaper.reaper_stats
+
     def extract_return_error(self, return_context):
         """ Extra error context from return context. """
         if 'msg' in return_context:
             return return_context['msg']
         return ""
 
-    def target(self, pattern):
-        """ Invoke ansible to Match target inside inventory by given pattern. """
-        _ansible_cli = AdHocCLI(["--list-hosts", pattern])
-        _ansible_cli.parse()
+    @property
+    def inventory(self):
+        """ The ``InventoryCache`` shared by all executors of process. """
+        with AnsibleExecutor._inventory_cache_lock:
+            if AnsibleExecutor._inventory_cache == None:
+                AnsibleExecutor._inventory_cache = InventoryCache(
+                    self._inventory_ttl, self._target_cache_size)
+        return AnsibleExecutor._inventory_cache
+
+    @property
+    def playbooks(self):
+        """ The ``PlaybookCache`` shared by all executors of process. """
+        with AnsibleExecutor._playbooks_cache_lock:
+            if (AnsibleExecutor._playbooks_cache == None or
+                    AnsibleExecutor._playbooks_cache.path !=
+                    self._playbooks_path):
+                AnsibleExecutor._playbooks_cache = PlaybookCache(
+                    self._playbooks_path)
+        return AnsibleExecutor._playbooks_cache
+
+    @property
+    def pool(self):
+        """ The ``ZygotePool`` shared by all executors of process.
+
+        Return ``None`` if the pool was disabled (``pool_size`` is 0), the
+        pool was owned by the process created it, forked processes (e.g.:
+        celery pool processes) create their own pools.
+
+        The inventory is parsed before all workers of the pool forked, and
+        inherited by them, see ``_serve``.
+        """
+        if self._pool_size <= 0:
+            return None
+        with AnsibleExecutor._pool_lock:
+            if (AnsibleExecutor._pool == None or
+                    AnsibleExecutor._pool.pid != os.getpid()):
+                try:
+                    self.inventory.prereqs()
+                except AnsibleError:
+                    raise ExecutorPrepareError(str(excinst()))
+                pool = ZygotePool(self._pool_size, self._serve)
+                pool.start()
+                AnsibleExecutor._pool = pool
+        return AnsibleExecutor._pool
 
-        LOG.debug("simulation ansible adhoc cli with "
-                  "<--list-hosts {0}>".format(pattern))
-        _, inventory, _ = _ansible_cli._play_prereqs(_ansible_cli.options)
+    def target(self, pattern):
+        """ Match target inside inventory by given pattern.
 
-        return [ h.get_name() for h in inventory.list_hosts(pattern) ]
+        The inventory was parsed once and cached inside process, see
+        ``InventoryCache`` for its invalidation.
+        """
+        return list(self.inventory.match(pattern))
 
     def deploy(self, roles, extra_vars=None, partial=None):
-        """ Invoke ansible-playbook to deploy services/roles on remote host(s). """
+        """ Invoke ansible-playbook to deploy services/roles on remote host(s).
+
+        The inventory and parsed playbooks are cached inside the process
+        (see ``InventoryCache`` and ``PlaybookCache``), and inherited by
+        forked ansible processes, back-to-back deploys never parse them
+        again until they changed.
+        """
         _playbook = os.path.join(self._playbooks_path, self.INIT_PB)
 
+        # Handle playbook tags
+        if partial and not isinstance(partial, (list, tuple)):
+            partial = [partial]
+        # Handle playbook extra_vars
+        if extra_vars:
+            if not isinstance(extra_vars, dict):
+                raise ExecutorDeployError("bad extra_vars for deploy")
+        else:
+            extra_vars = {}
+        extra_vars[self.ROLE_VAR] = roles
+
+        # Prepare the cached inventory and loader before fork
+        try:
+            _, inventory = self.inventory.prereqs()
+            loader = self.playbooks.loader()
+        except AnsibleError:
+            raise ExecutorPrepareError(str(excinst()))
+
+        return self._fork_shards(
+            lambda hosts, forks, siblings: self._fork_deploy(
+                _playbook, extra_vars, partial, (loader, inventory),
+                hosts, forks, siblings))
+
+    def _fork_deploy(self, playbook, extra_vars, partial, prereqs,
+                     hosts, forks, siblings):
+        """ Fork ansible-playbook process of deploy on ``hosts``. """
         # Playbook CLI args
         args = ["ansible-playbook"]
         # Handle init pb
-        args.append(_playbook)
+        args.append(playbook)
         # Handle playbook tags
         if partial:
-            if not isinstance(partial, (list, tuple)):
-                partial = [partial]
             args.append("--tags")
             args.append(",".join(partial))
         # Handle playbook forks
-        if self._concurrency:
+        if forks:
             args.append("--forks")
-            args.append(str(self._concurrency))
+            args.append(str(forks))
         # Handle playbook extra_vars
-        if extra_vars:
-            if not isinstance(extra_vars, dict):
-                raise ExecutorDeployError("bad extra_vars for deploy")
-        else:
-            extra_vars = {}
-        extra_vars[self.ROLE_VAR] = roles
-        extra_vars[self.TARGET_VAR] = self._hosts
+        extra_vars = dict(extra_vars)
+        extra_vars[self.TARGET_VAR] = hosts
 
         args.append("--extra-vars")
         args.append(json.dumps(extra_vars))
@@ -396,45 +835,58 @@ class AnsibleExecutor(ExecutorPrototype):
         _cli.parse()
         _cli.normalize_become_options()
 
-        # Prepare ansible internal datastructs
-        _loader, _inventory, _variable_manager = _cli._play_prereqs(_cli.options)
-        _options = _cli.options
-
         # Run it via fork() & PlaybookExecutor, and using AnsibleReaper as callback
-        reaper = AnsibleReaper(self._hosts, skip_announce=False)
+        reaper = AnsibleReaper(hosts, skip_announce=False,
+                               fields=self.DEPLOY_FIELDS,
+                               timeout=self._timeout,
+                               deadline=self._deadline)
         pid = os.fork()
         if pid:
+            reaper.reaper_parent()
             LOG.debug("ansible executor fork() for deploy, child pid is <{0}>".format(pid))
-            return reaper.reaper_returns(pid)
-        self._disable_daemonic()
-
-        pbex = PlaybookExecutor(
-            playbooks        = [_playbook],
-            inventory        = _inventory,
-            variable_manager = _variable_manager,
-            loader           = _loader,
-            options          = _options,
-            passwords        = {'conn_pass': None, 'become_pass': None}) # TODO: support become password
-        # FIXME: bad way to set callback, but we have no choices
-        pbex._tqm._stdout_callback  = reaper
-        pbex._tqm._callbacks_loaded = True  # don't load any callback plugins, just use reaper
+            return pid, reaper
+        self._fork_child(reaper, siblings)
 
         LOG.info(
             "deploy <{0}>, execute playbook <{1}> with extra_vars <{2}> "
             "and partial <{3}> on <{4}>".format(
-                roles, _playbook, extra_vars, partial, self._hosts))
+                extra_vars[self.ROLE_VAR], playbook, extra_vars,
+                partial, hosts))
 
+        pbex = None
+        watchdog = TaskWatchdog(self._task_timeout,
+                                lambda: getattr(pbex, '_tqm', None))
         try:
+            # Prepare ansible internal datastructs, the loader and
+            #   inventory are cached, only the variable manager is new
+            _loader, _inventory = prereqs
+            _variable_manager = self._variable_manager(
+                _loader, _inventory, _cli.options)
+            if self._fact_cache:
+                C.DEFAULT_GATHERING = "smart"
+                _variable_manager._fact_cache = ExeFactCache(
+                    self._fact_cache, self._fact_cache_timeout,
+                    self._fact_cache_ttl)
+            pbex = PlaybookExecutor(
+                playbooks        = [playbook],
+                inventory        = _inventory,
+                variable_manager = _variable_manager,
+                loader           = _loader,
+                options          = _cli.options,
+                passwords        = {'conn_pass': None, 'become_pass': None}) # TODO: support become password
+            # FIXME: bad way to set callback, but we have no choices
+            pbex._tqm._stdout_callback  = reaper
+            pbex._tqm._callbacks_loaded = True  # don't load any callback plugins, just use reaper
+
+            watchdog.start()
             pbex_result = pbex.run()
             LOG.debug("ansible PlaybookExecutor result: "
                       "<{0}>".format(pbex_result))
         except AnsibleError:
             reaper.reaper_exception(ExecutorPrepareError(str(excinst())))
         finally:
-            # prevent the child process exit before the ansible
-            #   callback ``v2_playbook_on_stats`` returns, which may
-            #   cause the parent reaper instance hang forever
-            reaper.reaper_await()
+            watchdog.stop()
+            reaper.reaper_close()
 
         LOG.debug("ansible executor deploy child process "
                   "(pid: <{0}>) done, exit".format(os.getpid()))
@@ -442,8 +894,21 @@ class AnsibleExecutor(ExecutorPrototype):
 
     def execute(self, module, skip_announce=True, **module_args):
         """ Invoke ansible module with given args on remote host(s). """
+        return self._execute(module, module_args, skip_announce)
+
+    def _execute(self, module, module_args, skip_announce=True, fields=None,
+                 extra_vars=None):
+        """ Invoke ansible module, only keep ``fields`` of return data.
+
+        Module args are templated with ``extra_vars`` (and host vars) if
+        given, e.g.: ``{{ var[inventory_hostname] }}`` for per host args.
+        """
         # AdHoc CLI args
         args = ["ansible"]
+        # Handle adHoc extra_vars
+        if extra_vars:
+            args.append("--extra-vars")
+            args.append(json.dumps(extra_vars))
         # Handle module name
         args.append("--module-name")
         args.append(module)
@@ -456,18 +921,41 @@ class AnsibleExecutor(ExecutorPrototype):
                 args += ["--args", _module_args.strip()] if _module_args.strip() else []
             else:
                 args += ["--args", _module_args.strip()]
+
+        # Run it inside pool worker if the zygote pool enabled
+        if self.pool != None:
+            return self._pool_execute(
+                self._adhoc_args(args, self._hosts, self._concurrency),
+                skip_announce, fields)
+
+        LOG.info("execute ansible module <{0}> with args <{1}> on "
+                 "<{2}>".format(module, module_args, self._hosts))
+
+        return self._fork_shards(
+            lambda hosts, forks, siblings: self._fork_execute(
+                self._adhoc_args(args, hosts, forks),
+                hosts, skip_announce, fields, siblings))
+
+    def _adhoc_args(self, args, hosts, forks):
+        """ Append forks and host pattern to ansible adhoc cli ``args``. """
+        args = list(args)
         # Handle adHoc forks
-        if self._concurrency:
+        if forks:
             args.append("--forks")
-            args.append(str(self._concurrency))
+            args.append(str(forks))
 
         # Host pattern
-        args.append(','.join(self._hosts))
+        args.append(','.join(hosts))
 
         LOG.debug("simulation ansible adhoc cli with <{0}>".format(args))
+        return args
 
+    def _fork_execute(self, args, hosts, skip_announce, fields, siblings):
+        """ Fork ansible adhoc cli process of ``args`` on ``hosts``. """
         # Prepare AnsibleReaper as callback
-        reaper = AnsibleReaper(self._hosts, skip_announce)
+        reaper = AnsibleReaper(hosts, skip_announce, fields=fields,
+                               timeout=self._timeout,
+                               deadline=self._deadline)
 
         # Prepare ansible options, make sure never ask pass
         _cli = AdHocCLI(args, reaper)
@@ -477,26 +965,167 @@ class AnsibleExecutor(ExecutorPrototype):
         # Run it via fork()
         pid = os.fork()
         if pid:
+            reaper.reaper_parent()
             LOG.debug("ansible executor fork() for execute, "
                       "child pid is <{0}>".format(pid))
-            return reaper.reaper_returns(pid)
-        self._disable_daemonic()
-
-        LOG.info("execute ansible module <{0}> with args <{1}> on "
-                 "<{2}>".format(module, module_args, self._hosts))
+            return pid, reaper
+        self._fork_child(reaper, siblings)
 
+        watchdog = TaskWatchdog(self._task_timeout,
+                                lambda: getattr(_cli, '_tqm', None))
         try:
+            watchdog.start()
             ad_hoc_result = _cli.run()
             LOG.debug("ansible AdHoc result: <{0}>".format(ad_hoc_result))
         except AnsibleError:
             reaper.reaper_exception(ExecutorPrepareError(str(excinst())))
         finally:
-            reaper.reaper_await()
+            watchdog.stop()
+            reaper.reaper_close()
 
         LOG.debug("ansible executor execute child process "
                   "(pid: <{0}>) done, exit".format(os.getpid()))
         os._exit(os.EX_OK)
 
+    def _fork_child(self, reaper, siblings):
+        """ Prepare the forked child process before run ansible.
+
+        Pipes of shards forked before are inherited by the child, close
+        them, otherwise their reapers never got EOF if their process gone.
+
+        The child leads its own process group, which contains all ansible
+        workers, the whole group is killed by the reaper after timed out.
+        """
+        os.setpgid(0, 0)
+        reaper.reaper_child()
+        for _, sibling in siblings:
+            sibling.reaper_close()
+        self._disable_daemonic()
+
+    def _shard_hosts(self):
+        """ Split hosts into shards, see ``shards`` of ``__init__``. """
+        count = min(self._shards, len(self._hosts) // self.SHARD_MIN_HOSTS)
+        if count <= 1:
+            return [self._hosts]
+        return [ self._hosts[idx::count] for idx in range(count) ]
+
+    def _fork_shards(self, fork):
+        """ Fork process of each shard and merge their outputs.
+
+        The ``fork(hosts, forks, siblings)`` forks the ansible process of
+        ``hosts``, and returns its ``(pid, reaper)`` pair, ``siblings`` are
+        pairs of shards forked before.
+        """
+        shards = self._shard_hosts()
+        forks = self._concurrency
+        if forks and len(shards) > 1:   # keep the total forks unchanged
+            forks = -(-forks // len(shards))
+
+        forked = []
+        try:
+            for hosts in shards:
+                forked.append(fork(hosts, forks, forked))
+        except:
+            # shards forked before are running, kill their process groups
+            #   (like the deadline does) instead of wait them done
+            for pid, reaper in forked:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except OSError:     # not leads its group yet, or gone
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except OSError:
+                        pass
+                reaper.reaper_cleanup(pid)
+            raise
+
+        if len(forked) == 1:
+            pid, reaper = forked[0]
+            self._reaper = reaper
+            return reaper.reaper_returns(pid)
+
+        LOG.debug("ansible executor forked <{0}> shards, child pids are "
+                  "<{1}>".format(len(forked), [ p for p, _ in forked ]))
+        self._reaper = AnsibleShardReaper(forked)
+        return self._reaper.reaper_returns()
+
+    def _pool_execute(self, args, skip_announce, fields=None):
+        """ Run ansible adhoc cli ``args`` inside worker of the zygote pool. """
+        pool = self.pool
+        worker = pool.acquire()
+        try:
+            worker.submit([args, self._hosts, skip_announce, fields])
+        except:
+            pool.drop(worker)
+            raise
+
+        reaper = AnsibleReaper(self._hosts, skip_announce, worker.channel,
+                               timeout=self._timeout,
+                               deadline=self._deadline)
+        self._reaper = reaper
+        LOG.debug("ansible executor send execute to zygote worker, "
+                  "worker pid is <{0}>".format(worker.pid))
+        return reaper.reaper_returns(
+            worker.pid, cleanup=lambda: pool.release(worker))
+
+    def _serve(self, channel):
+        """ Serve ansible adhoc cli works inside worker of the zygote pool.
+
+        The inventory was parsed by the pool owner before fork (and
+        reloaded after changed, see ``InventoryCache``), each work reuses
+        it (and its loader) with a fresh variable manager, no fork or
+        inventory parse per work.
+        """
+        self._disable_daemonic()
+
+        # locks of the parent process may be held by other threads while
+        #   fork(), which are never released inside this process
+        AnsibleExecutor._inventory_cache_lock = threading.Lock()
+        if AnsibleExecutor._inventory_cache != None:
+            AnsibleExecutor._inventory_cache.after_fork()
+
+        while True:
+            try:
+                args, hosts, skip_announce, fields = channel.get()
+            except EOFError:    # the pool owner was gone
+                return
+
+            LOG.info("zygote worker <{0}> execute ansible adhoc cli with "
+                     "<{1}>".format(os.getpid(), args))
+            reaper = AnsibleReaper(hosts, skip_announce, channel, fields)
+            _cli = None
+            watchdog = TaskWatchdog(self._task_timeout,
+                                    lambda: getattr(_cli, '_tqm', None))
+            try:
+                _cli = AdHocCLI(args, reaper)
+                _cli.parse()
+                _cli.options.ask_pass = False
+                _cli._play_prereqs = self._pool_prereqs
+                watchdog.start()
+                ad_hoc_result = _cli.run()
+                LOG.debug("ansible AdHoc result: <{0}>".format(ad_hoc_result))
+            except:
+                reaper.reaper_exception(ExecutorPrepareError(str(excinst())))
+            finally:
+                watchdog.stop()
+                channel.put([EVENT_END, None])
+
+    def _pool_prereqs(self, options):
+        """ Replacement of ``CLI._play_prereqs`` for pool workers. """
+        loader, inventory = self.inventory.prereqs()
+        return loader, inventory, self._variable_manager(
+            loader, inventory, options)
+
+    def _variable_manager(self, loader, inventory, options):
+        """ Create variable manager of cli ``options`` like ``CLI._play_prereqs``. """
+        variable_manager = VariableManager(loader=loader, inventory=inventory)
+        variable_manager.safe_basedir = True
+        variable_manager.extra_vars = load_extra_vars(loader=loader,
+                                                      options=options)
+        variable_manager.options_vars = load_options_vars(
+            options, CLI.version_info(gitinfo=False))
+        return variable_manager
+
     def raw_execute(self, cmd):
         """ Invoke ansible command module on remote host(s). """
         _raw = { self.RAW_ARG: cmd }
@@ -507,16 +1136,155 @@ class AnsibleExecutor(ExecutorPrototype):
                 'stderr': result.get(EXE_RETURN_ATTR).pop('stderr', ""),
                 'rtc'   : result.get(EXE_RETURN_ATTR).pop('rc', -1)}}
 
-        for _out in self.execute(self.CMD_MODULE, **_raw):
+        for _out in self._execute(self.CMD_MODULE, _raw,
+                                  fields=self.CMD_FIELDS):
             yield _handler(*_out.popitem())
 
+    def stream_execute(self, cmd, interval=STREAM_INTERVAL,
+                       chunk=STREAM_CHUNK):
+        """ Invoke command on remote host(s), yield outputs chunk by chunk.
+
+        The command runs in background (by ``nohup``) with its outputs
+        written into files of a remote directory, which are polled by the
+        shell module every ``interval`` seconds on hosts still running,
+        each poll ships at most ``chunk`` bytes of new stdout and stderr:
+
+            {$host -> {EXE_STATUS_ATTR -> $state (int),
+                       'stdout' -> $stdout_chunk (string),
+                       'stderr' -> $stderr_chunk (string),
+                       'rtc'    -> $ret_code (int or None)}}
+
+        The ``rtc`` is ``None`` until the last chunk of host, polls which
+        ship nothing are not yielded.
+
+        The whole stream (the start, all polls and the kill) should be done
+        before the deadline of the executor (``timeout`` seconds after it
+        bound), otherwise commands still running are killed, their
+        hosts are yield with ``EXE_TIMEOUT`` state, and then
+        ``ExecutorTimeoutError`` raised.
+        """
+        _start = self.STREAM_START.format(
+            wrapper=shlex.quote(self.STREAM_WRAPPER.format(
+                cmd=shlex.quote(cmd))))
+        _poll = "c={0}; {1}".format(int(chunk), self.STREAM_POLL)
+        deadline = self._deadline
+
+        LOG.info("stream command <{0}> on <{1}>".format(cmd, self._hosts))
+
+        # the remote directory of each host, created by the start
+        dirs = {}
+        for _out in self._execute(self.CMD_MODULE, {self.RAW_ARG: _start},
+                                  fields=self.CMD_FIELDS):
+            host, result = _out.popitem()
+            _dir = (result.get(EXE_RETURN_ATTR) or {}).get(
+                'stdout', "").strip()
+            if result.get(EXE_STATUS_ATTR) in EXE_FAILURE_STATES or \
+                    not _dir.startswith("/"):
+                yield {host: self._stream_failure(result)}
+            else:
+                dirs[host] = _dir
+        running = set(dirs)
+
+        errmsg = None
+        try:
+            while running:
+                if deadline != None and time.time() + interval >= deadline:
+                    time.sleep(max(deadline - time.time(), 0))
+                    break
+                time.sleep(interval)
+
+                self.set_hosts(sorted(running))
+                try:
+                    for _out in self._execute(
+                            self.CMD_MODULE, {self.RAW_ARG: _poll},
+                            fields=self.CMD_FIELDS,
+                            extra_vars=self._stream_vars(dirs, running)):
+                        host, result = _out.popitem()
+                        if result.get(EXE_STATUS_ATTR) == EXE_TIMEOUT:
+                            continue    # still running, killed below
+                        output = self._stream_output(result)
+                        if output['rtc'] != None:
+                            running.discard(host)
+                        elif not (output['stdout'] or output['stderr']):
+                            continue
+                        yield {host: output}
+                finally:
+                    self.reset_hosts()
+        except ExecutorTimeoutError:
+            errmsg = str(excinst())
+        finally:
+            # stats of polls are meaningless for the command
+            self._reaper = None
+
+        if not running:
+            return
+        if errmsg == None:
+            errmsg = "stream command timed out after <{0}> seconds".format(
+                self._timeout)
+        LOG.warning("{0}, kill command on <{1}>".format(errmsg, running))
+
+        # the deadline already passed, the kill has its own one
+        self.set_hosts(sorted(running))
+        self._deadline = time.time() + self.STREAM_KILL_TIMEOUT
+        try:
+            for _ in self._execute(
+                    self.CMD_MODULE, {self.RAW_ARG: self.STREAM_KILL},
+                    fields=(), extra_vars=self._stream_vars(dirs, running)):
+                pass
+        except ExecutorTimeoutError:
+            pass
+        finally:
+            self._deadline = deadline
+            self.reset_hosts()
+            self._reaper = None
+
+        for host in sorted(running):
+            yield {host: {EXE_STATUS_ATTR: EXE_TIMEOUT, 'stdout': "",
+                          'stderr': errmsg, 'rtc': -1}}
+        raise ExecutorTimeoutError(errmsg)
+
+    def _stream_vars(self, dirs, hosts):
+        """ Extra vars of stream polls, remote directory of each host. """
+        return {self.STREAM_VAR: dict([ (host, dirs[host])
+                                        for host in hosts ])}
+
+    def _stream_output(self, result):
+        """ Parse return data of stream poll into output chunk. """
+        _return = result.get(EXE_RETURN_ATTR) or {}
+        header, _, stdout = _return.get('stdout', "").partition("\n")
+        header = header.split()
+        if result.get(EXE_STATUS_ATTR) in EXE_FAILURE_STATES or \
+                not header or header[0] not in ("running", "done"):
+            return self._stream_failure(result)
+
+        # chunks are followed by a ``.``, keep their trailing newlines
+        #   from stripped by the shell module
+        output = {EXE_STATUS_ATTR: EXE_OK, 'stdout': stdout[:-1],
+                  'stderr': _return.get('stderr', "")[:-1], 'rtc': None}
+        if header[0] == "done":
+            try:
+                output['rtc'] = int(header[1])
+            except (IndexError, ValueError):
+                output['rtc'] = -1
+            if output['rtc'] != 0:
+                output[EXE_STATUS_ATTR] = EXE_FAILED
+        return output
+
+    def _stream_failure(self, result):
+        """ Output of host whose stream start or poll failed. """
+        _return = result.get(EXE_RETURN_ATTR) or {}
+        return {EXE_STATUS_ATTR: result.get(EXE_STATUS_ATTR, EXE_FAILED),
+                'stdout': "",
+                'stderr': _return.get('stderr') or _return.get('msg', ""),
+                'rtc': _return.get('rc', -1)}
+
     def ping(self):
         """ Invoke ansible ping module on remote host(s). """
         _handler = lambda host, result: {
             host: {
                 EXE_STATUS_ATTR: result.get(EXE_STATUS_ATTR)}}
 
-        for _out in self.execute(self.PING_MODULE):
+        for _out in self._execute(self.PING_MODULE, {}, fields=()):
             yield _handler(*_out.popitem())
 
     def facter(self):
@@ -527,12 +1295,13 @@ class AnsibleExecutor(ExecutorPrototype):
                 'facts': dict(
                     [ (attr, val)
                         for attr, val in
-                            result.pop(EXE_RETURN_ATTR).pop('ansible_facts').items() ]
+                            result.pop(EXE_RETURN_ATTR).pop('ansible_facts', {}).items() ]
                 )
             }
         }
 
-        for _out in self.execute(self.FACTER_MODULE):
+        for _out in self._execute(self.FACTER_MODULE, {},
+                                  fields=self.FACTER_FIELDS):
             yield _handler(*_out.popitem())
 
     def service(self, name, start=True, restart=False, graceful=True):
@@ -547,6 +1316,7 @@ class AnsibleExecutor(ExecutorPrototype):
             host: {
                 EXE_STATUS_ATTR: result.pop(EXE_STATUS_ATTR)}}
 
-        for _out in self.execute(self.SERVICE_MODULE,
-                                 name=name, state=state, enabled=enabled):
+        for _out in self._execute(self.SERVICE_MODULE,
+                                  dict(name=name, state=state,
+                                       enabled=enabled), fields=()):
             yield _handler(*_out.popitem())
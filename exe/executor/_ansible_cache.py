@@ -0,0 +1,290 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import os
+import time
+import hashlib
+import logging
+import os.path
+import threading
+import collections
+
+from ansible import constants as C
+from ansible.cli import CLI
+from ansible.cli.adhoc import AdHocCLI
+from ansible.cli.playbook import PlaybookCLI
+from ansible.errors import AnsibleError
+from ansible.parsing.dataloader import DataLoader
+
+from exe.utils.err import excinst
+
+
+LOG = logging.getLogger(__name__)
+
+
+## Consts ##
+INVENTORY_TTL = 300         # seconds dynamic inventory kept before reload
+INVENTORY_CHECK = 1         # min seconds between two inventory change checks
+PATTERN_CACHE_SIZE = 1024   # max pattern match results cached
+PLAYBOOKS_SKIP_DIRS = ("files", "templates")    # never parsed by loader
+
+
+def _inventory_signature(sources):
+    """ Return ``(signature, dynamic)`` pair of inventory sources.
+
+    The signature contains path, mtime and size of each inventory file
+    (files inside inventory directories included), inventory sources
+    which are not files (e.g.: host list like ``host-1,host-2,``) are
+    kept as they are.
+
+    The ``dynamic`` is ``True`` if there is any executable inventory
+    file (inventory script), whose content never changes while the
+    inventory it generated does.
+    """
+    signature = []
+    dynamic = False
+    for source in sources or []:
+        if os.path.isdir(source):
+            paths = sorted([ os.path.join(root, f)
+                             for root, _, files in os.walk(source)
+                             for f in files ])
+        elif os.path.exists(source):
+            paths = [source]
+        else:
+            signature.append(source)
+            continue
+
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:     # removed while walking
+                continue
+            if os.access(path, os.X_OK):
+                dynamic = True
+            signature.append((path, st.st_mtime, st.st_size))
+    return tuple(signature), dynamic
+
+
+def _playbooks_files(path):
+    """ Return sorted paths of yaml/json files inside playbooks directory.
+
+    Files inside ``files`` and ``templates`` directories of roles are
+    skipped, which are copied or rendered by modules instead of parsed.
+    """
+    paths = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [ d for d in dirs if d not in PLAYBOOKS_SKIP_DIRS ]
+        paths.extend([ os.path.join(root, f) for f in files
+                       if os.path.splitext(f)[1] in
+                          C.YAML_FILENAME_EXTENSIONS ])
+    return sorted(paths)
+
+
+def _playbooks_digest(path, paths):
+    """ Return sha1 hex digest of relative path and content of files. """
+    digest = hashlib.sha1()
+    for _path in paths:
+        try:
+            with open(_path, 'rb') as f:
+                content = f.read()
+        except (IOError, OSError):  # removed while walking
+            continue
+        digest.update(os.path.relpath(_path, path).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(content)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class InventoryCache(object):
+    """ Process level cache of parsed ansible inventory.
+
+    Parse the inventory (and run inventory scripts) costs seconds for
+    large inventories, the cache keeps the parsed inventory until any
+    inventory file changed (checked by their mtime and size at most once
+    per ``INVENTORY_CHECK`` seconds), or ``ttl`` seconds passed if there
+    are inventory scripts (``0`` for never expire).
+
+    Hosts matched by each pattern are also cached inside a LRU with at
+    most ``size`` patterns, which got cleared after inventory reload.
+    """
+
+    def __init__(self, ttl=INVENTORY_TTL, size=PATTERN_CACHE_SIZE):
+        """ Initialize InventoryCache instance. """
+        self._ttl = ttl
+        self._size = max(size, 0)
+
+        self._lock = threading.Lock()
+        self._loader = None
+        self._inventory = None
+        self._sources = None
+        self._signature = None
+        self._dynamic = False
+        self._loaded_at = 0
+        self._checked_at = 0
+
+        self._patterns = collections.OrderedDict()
+
+    def match(self, pattern):
+        """ Return tuple of host names matched by given pattern. """
+        with self._lock:
+            self._refresh()
+
+            hosts = self._patterns.get(pattern)
+            if hosts != None:
+                self._patterns.move_to_end(pattern)
+                return hosts
+
+            hosts = tuple([ h.get_name()
+                            for h in self._inventory.list_hosts(pattern) ])
+            if self._size:
+                self._patterns[pattern] = hosts
+                if len(self._patterns) > self._size:
+                    self._patterns.popitem(last=False)
+            return hosts
+
+    def prereqs(self):
+        """ Return ``(loader, inventory)`` pair of the cached inventory.
+
+        Any subset or restriction left by previous run will be removed.
+        """
+        with self._lock:
+            self._refresh()
+            self._inventory.subset(None)
+            self._inventory.remove_restriction()
+            return self._loader, self._inventory
+
+    def after_fork(self):
+        """ Replace the lock inside forked child, keep the parsed inventory.
+
+        The lock may be held by other threads of the parent while fork(),
+        which is never released inside the child.
+        """
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """ Reload inventory if it was changed or expired. """
+        now = time.time()
+        if self._inventory != None:
+            if self._dynamic and self._ttl and (
+                    now - self._loaded_at >= self._ttl):
+                LOG.info("inventory expired, going to reload")
+            elif now - self._checked_at < INVENTORY_CHECK:
+                return
+            else:
+                self._checked_at = now
+                signature, _ = _inventory_signature(self._sources)
+                if signature == self._signature:
+                    return
+                LOG.info("inventory changed, going to reload")
+        self._load()
+
+    def _load(self):
+        """ Parse inventory via ansible adhoc cli internals. """
+        _ansible_cli = AdHocCLI(["--list-hosts", "all"])
+        _ansible_cli.parse()
+
+        LOG.debug("simulation ansible adhoc cli with <--list-hosts all> "
+                  "for load inventory")
+        loader, inventory, _ = _ansible_cli._play_prereqs(_ansible_cli.options)
+
+        self._sources = _ansible_cli.options.inventory
+        self._signature, self._dynamic = _inventory_signature(self._sources)
+        self._loader = loader
+        self._inventory = inventory
+        self._loaded_at = self._checked_at = time.time()
+        self._patterns.clear()
+
+        LOG.info("inventory <{0}> loaded, dynamic: <{1}>".format(
+            self._sources, self._dynamic))
+
+
+class PlaybookCache(object):
+    """ Process level cache of parsed playbooks, roles and vars files.
+
+    Every yaml/json file inside the playbooks directory is parsed once
+    into the file cache of a ``DataLoader``, forked ansible processes
+    inherit the loader, and get parsed data from its cache instead of
+    read and parse files again.
+
+    The loader is keyed by the sha1 digest of those files' content, which
+    is computed again only after any of them changed (checked by their
+    mtime and size at most once per ``INVENTORY_CHECK`` seconds), a new
+    loader is created if the digest changed.
+    """
+
+    def __init__(self, path):
+        """ Initialize PlaybookCache instance of playbooks directory. """
+        self._path = path
+
+        self._lock = threading.Lock()
+        self._loader = None
+        self._signature = None
+        self._digest = None
+        self._checked_at = 0
+
+    @property
+    def path(self):
+        """ Path of the playbooks directory. """
+        return self._path
+
+    @property
+    def digest(self):
+        """ Content digest of playbooks which the cached loader parsed. """
+        return self._digest
+
+    def loader(self):
+        """ Return the ``DataLoader`` with parsed playbooks inside. """
+        with self._lock:
+            self._refresh()
+            return self._loader
+
+    def _refresh(self):
+        """ Reload playbooks if their content was changed. """
+        now = time.time()
+        if self._loader != None and now - self._checked_at < INVENTORY_CHECK:
+            return
+        self._checked_at = now
+
+        paths = _playbooks_files(self._path)
+        signature, _ = _inventory_signature(paths)
+        if self._loader != None and signature == self._signature:
+            return
+        self._signature = signature
+
+        digest = _playbooks_digest(self._path, paths)
+        if digest == self._digest:  # touched without changes
+            return
+        if self._loader != None:
+            LOG.info("playbooks changed, going to reload")
+        self._load(paths, digest)
+
+    def _load(self, paths, digest):
+        """ Parse playbooks into the file cache of a new ``DataLoader``.
+
+        Files can not be parsed (e.g.: bad yaml or unknown vault secret)
+        are skipped, ansible will report their error when they are used.
+        """
+        _ansible_cli = PlaybookCLI(["ansible-playbook", self._path])
+        _ansible_cli.parse()
+
+        loader = DataLoader()
+        loader.set_vault_secrets(CLI.setup_vault_secrets(
+            loader,
+            vault_ids=(C.DEFAULT_VAULT_IDENTITY_LIST +
+                       _ansible_cli.options.vault_ids),
+            vault_password_files=_ansible_cli.options.vault_password_files,
+            ask_vault_pass=False, auto_prompt=False))
+
+        cached = 0
+        for path in paths:
+            try:
+                loader.load_from_file(path, cache=True, unsafe=True)
+                cached += 1
+            except AnsibleError:
+                LOG.debug("playbook file <{0}> not cached, {1}".format(
+                    path, excinst()))
+
+        self._loader = loader
+        self._digest = digest
+        LOG.info("playbooks <{0}> loaded, digest: <{1}>, files cached: "
+                 "<{2}/{3}>".format(self._path, digest, cached, len(paths)))
@@ -0,0 +1,115 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import os
+import json
+import struct
+import threading
+
+
+__all__ = ["FrameChannel", "EVENT_PLAY", "EVENT_TASK", "EVENT_HOSTS",
+           "EVENT_ITEMS", "EVENT_STATS", "EVENT_ERROR", "EVENT_END"]
+
+
+## Consts ##
+EVENT_PLAY  = "play"    # [EVENT_PLAY, {name, hosts}]
+EVENT_TASK  = "task"    # [EVENT_TASK, {name, path, tags}]
+EVENT_HOSTS = "hosts"   # [EVENT_HOSTS, {$host: {name, status, return_data}}]
+EVENT_ITEMS = "items"   # [EVENT_ITEMS, {$host: {name, status, return_data}}]
+EVENT_STATS = "stats"   # [EVENT_STATS, {$host: {ok, changed, ...}}]
+EVENT_ERROR = "error"   # [EVENT_ERROR, $message]
+EVENT_END   = "end"     # [EVENT_END, null], sent after each pool work done
+
+FRAME_HEADER = struct.Struct("!I")  # length of each frame
+
+
+def _encode(event):
+    """ Encode event into frame bytes. """
+    payload = json.dumps(event, separators=(',', ':'),
+                         default=str).encode('utf-8')
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class FrameChannel(object):
+    """ Reaper channel over os pipes with length prefixed framing.
+
+    Each event is a json array ``[$type, $payload]`` encoded by the
+    writer side, and prefixed with its length (4 bytes, big endian), the
+    reader side decodes each frame into a new object, which can be
+    handed out without copy.
+
+    Either ``rfd`` or ``wfd`` can be ``None`` for one way channel.
+    """
+
+    def __init__(self, rfd=None, wfd=None):
+        """ Initialize FrameChannel instance. """
+        self._rfd = rfd
+        self._wfd = wfd
+        self._lock = threading.Lock()
+        self._ended = False
+
+    @classmethod
+    def pipe(cls):
+        """ Create channel over a new pipe, should be split after fork(). """
+        rfd, wfd = os.pipe()
+        return cls(rfd, wfd)
+
+    @property
+    def ended(self):
+        """ ``True`` if the ``EVENT_END`` of current work was received. """
+        return self._ended
+
+    def fileno(self):
+        """ The read side fd, for ``select()``. """
+        return self._rfd
+
+    def begin(self):
+        """ Begin a new work, reset the ``ended`` flag. """
+        self._ended = False
+
+    def put(self, event):
+        """ Encode and write event. """
+        data = _encode(event)
+        with self._lock:
+            while data:
+                data = data[os.write(self._wfd, data):]
+
+    def get(self):
+        """ Read and decode the next event, raise ``EOFError`` on EOF. """
+        size, = FRAME_HEADER.unpack(self._read(FRAME_HEADER.size))
+        event = json.loads(self._read(size).decode('utf-8'))
+        if event[0] == EVENT_END:
+            self._ended = True
+        return event
+
+    def drain(self):
+        """ Discard events until the ``EVENT_END`` of current work. """
+        while not self._ended:
+            self.get()
+
+    def _read(self, size):
+        """ Read exactly ``size`` bytes. """
+        chunks = []
+        while size:
+            chunk = os.read(self._rfd, size)
+            if not chunk:
+                raise EOFError("channel closed by the other side")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def close_read(self):
+        """ Close the read side. """
+        if self._rfd != None:
+            os.close(self._rfd)
+            self._rfd = None
+
+    def close_write(self):
+        """ Close the write side. """
+        if self._wfd != None:
+            os.close(self._wfd)
+            self._wfd = None
+
+    def close(self):
+        """ Close both sides. """
+        self.close_read()
+        self.close_write()
@@ -0,0 +1,78 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import redis
+
+from ansible.plugins.cache import BaseCacheModule
+from ansible.plugins.cache import FactCache as AnsibleFactCache
+
+from .consts import EXE_OK, EXE_STATUS_ATTR
+
+from exe.utils.facts import FactCache, FACTS_TTL, FACTS_MAX_AGE
+
+
+class ExeFactCacheModule(BaseCacheModule):
+    """ Ansible cache plugin on top of the fact cache of exed.
+
+    Facts are kept as the return context of facter (``{status, facts}``)
+    inside the keys of ``FactCache``, facts gathered by deploy and those
+    gathered by ``/facter`` are shared, facts older than ``timeout``
+    seconds (``0`` for never) are treated as missing, which makes smart
+    gathering gather them again.
+    """
+
+    def __init__(self, url, timeout=FACTS_MAX_AGE, ttl=FACTS_TTL):
+        """ Initialize ExeFactCacheModule instance. """
+        self._cache = FactCache(
+            redis.Redis.from_url(url, decode_responses=True), ttl)
+        self._timeout = timeout
+        self._loaded = {}   # facts and age of hosts loaded during this run
+
+    def _load(self, key):
+        """ Load ``(facts, age)`` of host once per run. """
+        if key not in self._loaded:
+            context, age = self._cache.get(key, hot=False)
+            facts = context.get('facts') if context else None
+            self._loaded[key] = (facts, age)
+        return self._loaded[key]
+
+    def get(self, key):
+        facts, _ = self._load(key)
+        if facts == None:
+            raise KeyError(key)
+        return facts
+
+    def set(self, key, value):
+        self._cache.put({key: {EXE_STATUS_ATTR: EXE_OK, 'facts': value}})
+        self._loaded[key] = (value, 0)
+
+    def keys(self):
+        return self._cache.targets()
+
+    def contains(self, key):
+        facts, age = self._load(key)
+        return facts != None and (not self._timeout or age < self._timeout)
+
+    def delete(self, key):
+        self._cache.delete([key])
+        self._loaded.pop(key, None)
+
+    def flush(self):
+        self._cache.delete(self.keys())
+        self._loaded.clear()
+
+    def copy(self):
+        return dict([ (key, self.get(key)) for key in self.keys()
+                      if self.contains(key) ])
+
+
+class ExeFactCache(AnsibleFactCache):
+    """ Ansible ``FactCache`` backed by ``ExeFactCacheModule``.
+
+    Instead of the plugin named by ``CACHE_PLUGIN`` of ansible config,
+    which should be set to the ``_fact_cache`` of ``VariableManager``.
+    """
+
+    def __init__(self, url, timeout=FACTS_MAX_AGE, ttl=FACTS_TTL):
+        """ Initialize ExeFactCache instance. """
+        self._plugin = ExeFactCacheModule(url, timeout, ttl)
+        self._cache = {}
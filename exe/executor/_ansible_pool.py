@@ -0,0 +1,144 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import os
+import signal
+import logging
+import threading
+
+from ._ansible_channel import FrameChannel
+
+
+LOG = logging.getLogger(__name__)
+
+
+class ZygoteWorker(object):
+    """ Pre-forked pool worker seen by the parent process. """
+
+    def __init__(self, pid, channel):
+        """ Initialize ZygoteWorker instance. """
+        self.pid = pid
+        self.channel = channel
+
+    def submit(self, work):
+        """ Send work to the worker, its events are read from ``channel``. """
+        self.channel.begin()
+        self.channel.put(work)
+
+    def kill(self):
+        """ Terminate and reap the worker process. """
+        self.channel.close()
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+            os.waitpid(self.pid, 0)
+        except OSError:
+            pass
+
+
+class ZygotePool(object):
+    """ Pool of pre-forked processes which serve executor works.
+
+    Each worker runs ``serve(channel)`` right after ``fork()``, which
+    inherits everything the owner prepared before (e.g.: the parsed
+    inventory), and then serve works received from ``channel`` (a
+    ``FrameChannel``) one by one until ``channel`` closed, events of each
+    work are sent back via ``channel`` and followed by ``EVENT_END``.
+
+    All ``size`` workers are forked by ``start``, and reused after the
+    work done, a broken worker (e.g.: got killed) is dropped and another
+    one will be forked when needed.
+    """
+
+    def __init__(self, size, serve):
+        """ Initialize ZygotePool instance. """
+        self._pid = os.getpid()
+        self._size = size
+        self._serve = serve
+
+        self._lock = threading.Condition()
+        self._idle = []
+        self._workers = {}
+        self._spawning = 0
+
+    @property
+    def pid(self):
+        """ Pid of the process which owns this pool. """
+        return self._pid
+
+    def start(self):
+        """ Fork all ``size`` workers, invoked once after the pool created. """
+        for _ in range(self._size - len(self._workers)):
+            worker = self._spawn()
+            with self._lock:
+                self._workers[worker.pid] = worker
+                self._idle.append(worker)
+                self._lock.notify()
+
+    def acquire(self):
+        """ Acquire an idle worker, fork one if there is no idle worker. """
+        with self._lock:
+            while not self._idle and (
+                    len(self._workers) + self._spawning >= self._size):
+                self._lock.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._spawning += 1     # reserve the slot before fork
+
+        try:
+            worker = self._spawn()
+            with self._lock:
+                self._workers[worker.pid] = worker
+            return worker
+        finally:
+            with self._lock:
+                self._spawning -= 1
+                self._lock.notify()
+
+    def release(self, worker):
+        """ Release worker after its current work done.
+
+        The remain events of current work are discarded, if the worker was
+        broken, it will be killed and dropped.
+        """
+        try:
+            worker.channel.drain()
+        except (EOFError, OSError):
+            self.drop(worker)
+            return
+
+        with self._lock:
+            self._idle.append(worker)
+            self._lock.notify()
+
+    def drop(self, worker):
+        """ Kill and drop a broken worker. """
+        LOG.warning("zygote worker <{0}> broken, dropped".format(worker.pid))
+        worker.kill()
+        with self._lock:
+            self._workers.pop(worker.pid, None)
+            self._lock.notify()
+
+    def _spawn(self):
+        """ Fork a new worker. """
+        work_rfd, work_wfd = os.pipe()
+        event_rfd, event_wfd = os.pipe()
+        pid = os.fork()
+        if pid:
+            os.close(work_rfd)
+            os.close(event_wfd)
+            LOG.info("zygote worker <{0}> forked".format(pid))
+            return ZygoteWorker(pid, FrameChannel(event_rfd, work_wfd))
+
+        # inside the worker, channels of other workers are useless, and
+        #   the worker leads its own process group (see ``AnsibleReaper``)
+        os.setpgid(0, 0)
+        os.close(work_wfd)
+        os.close(event_rfd)
+        for worker in list(self._workers.values()):
+            worker.channel.close()
+        try:
+            self._serve(FrameChannel(work_rfd, event_wfd))
+        except:
+            LOG.exception("zygote worker <{0}> got unexpected "
+                          "error".format(os.getpid()))
+        finally:
+            os._exit(os.EX_OK)
@@ -0,0 +1,130 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import os
+import time
+import signal
+import logging
+import threading
+
+from ansible.errors import AnsibleError
+
+
+__all__ = ["TaskWatchdog", "task_timed_out"]
+
+
+LOG = logging.getLogger(__name__)
+
+
+## Consts ##
+WATCHDOG_INTERVAL = 1               # seconds between two scans of workers
+WATCHDOG_SIGNAL = signal.SIGUSR1    # signal sent to workers timed out
+TASK_TIMEOUT_PREFIX = "task timed out"
+TASK_TIMEOUT_MSG = TASK_TIMEOUT_PREFIX + " after <{0}> seconds on this host"
+
+
+class TaskTimeoutError(AnsibleError):
+    """ Raised inside the ansible worker whose task passed the timeout. """
+    pass
+
+
+def task_timed_out(result):
+    """ Whether the failed ansible ``result`` was ended by the watchdog. """
+    msg = result.get('msg')
+    return isinstance(msg, str) and msg.startswith(TASK_TIMEOUT_PREFIX)
+
+
+def _exited(pid):
+    """ Whether child ``pid`` exited, without reap it (which is not ours). """
+    try:
+        return os.waitid(os.P_PID, pid,
+                         os.WEXITED | os.WNOHANG | os.WNOWAIT) != None
+    except OSError:     # already reaped
+        return True
+
+
+class TaskWatchdog(object):
+    """ End the task of each host which runs longer than ``timeout``.
+
+    Ansible runs each task of each host by its own worker process, the
+    watchdog thread runs inside the ansible process, scans the workers of
+    the task queue manager (returned by ``tqm()``, ``None`` before it was
+    created) every ``WATCHDOG_INTERVAL`` seconds, and signals the worker
+    which runs longer than ``timeout`` seconds (``0`` for no limit).
+
+    The signal handler was installed before workers forked and inherited
+    by them, it raises ``AnsibleError`` inside the worker, which makes the
+    task of that host fail with ``TASK_TIMEOUT_MSG``, other hosts and the
+    rest of the run are not affected.
+
+    Only ``os.waitid()`` (without reap) and ``os.kill()`` are called by
+    the thread, which never holds a lock inherited by workers forked
+    meanwhile.
+    """
+
+    def __init__(self, timeout, tqm):
+        """ Initialize TaskWatchdog instance. """
+        self._timeout = timeout
+        self._tqm = tqm
+        self._stopped = threading.Event()
+        self._thread = None
+        self._handler = None    # signal handler replaced by ``start``
+
+    def start(self):
+        """ Install the signal handler and start the watchdog thread. """
+        if not self._timeout:
+            return
+        self._handler = signal.signal(WATCHDOG_SIGNAL, self._expire)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watch,
+                                        name="exe-task-watchdog")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop the watchdog thread and restore the signal handler. """
+        if self._thread == None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        signal.signal(WATCHDOG_SIGNAL, self._handler or signal.SIG_DFL)
+
+    def _expire(self, signum, frame):
+        """ Signal handler, runs inside the worker timed out. """
+        raise TaskTimeoutError(TASK_TIMEOUT_MSG.format(self._timeout))
+
+    def _watch(self):
+        """ Signal workers which run longer than ``timeout`` seconds. """
+        started = {}    # worker -> timestamp it was first seen
+        signaled = set()
+        while not self._stopped.wait(WATCHDOG_INTERVAL):
+            tqm = self._tqm()
+            if tqm == None:
+                continue
+
+            now = time.time()
+            workers = {}
+            for slot in list(getattr(tqm, '_workers', None) or []):
+                # ``[worker, result_queue]`` pairs (ansible 2.7)
+                worker = slot[0] if isinstance(slot, list) else slot
+                # the returncode is set once the worker was reaped, its
+                #   pid may be reused by others after that
+                if (worker == None or worker.pid == None or
+                        getattr(worker._popen, 'returncode', None) != None or
+                        _exited(worker.pid)):
+                    continue
+                workers[worker] = started.get(worker, now)
+            started = workers
+
+            for worker, start in started.items():
+                if worker in signaled or now - start < self._timeout:
+                    continue
+                signaled.add(worker)
+                LOG.warning("ansible worker <{0}> runs more than <{1}> "
+                            "seconds, end its task".format(worker.pid,
+                                                           self._timeout))
+                try:
+                    os.kill(worker.pid, WATCHDOG_SIGNAL)
+                except OSError:     # already gone
+                    pass
+            signaled.intersection_update(started)
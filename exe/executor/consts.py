@@ -7,6 +7,7 @@ EXE_SKIPED      = 2
 EXE_FAILED      = 3
 EXE_UNREACHABLE = 4
 EXE_CHANGED     = 5
+EXE_TIMEOUT     = 6
 EXE_NO_MATCH    = -1
 
 ## Executor Result Status Name ##
@@ -17,6 +18,7 @@ EXE_STATUS_MAP = {
     EXE_FAILED      : "FAILED",
     EXE_UNREACHABLE : "UNREACHABLE",
     EXE_CHANGED     : "CHANGED",
+    EXE_TIMEOUT     : "TIMEOUT",
     EXE_NO_MATCH    : "NO MATCH",
 }
 
@@ -29,7 +31,7 @@ EXE_ANNOUNCE_SUMMARY_ATTR = "__ANNOUNCE_SUMMARY__"
 
 ## Executor Result Status Set ##
 EXE_SUCCESS_STATES = (EXE_OK, EXE_SKIPED, EXE_CHANGED, EXE_ANNOUNCE)
-EXE_FAILURE_STATES = (EXE_FAILED, EXE_UNREACHABLE, EXE_NO_MATCH)
+EXE_FAILURE_STATES = (EXE_FAILED, EXE_UNREACHABLE, EXE_NO_MATCH, EXE_TIMEOUT)
 
 ## Executor Consts ##
 EXECUTOR_UNSET = None
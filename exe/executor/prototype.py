@@ -1,5 +1,8 @@
 # (c) 2016, Hao Feng <whisperaven@gmail.com>
 
+import time
+import copy
+
 from abc import ABC, abstractmethod
 
 from .consts import EXECUTOR_UNSET
@@ -15,6 +18,7 @@ class ExecutorPrototype(ABC):
         self._slot = None
         self._hosts = hosts if isinstance(hosts, (tuple, list)) else [hosts]
         self._timeout = timeout
+        self._deadline = None
         self._concurrency = concurrency
 
     @classmethod
@@ -27,6 +31,33 @@ class ExecutorPrototype(ABC):
         """ Host to manipulation of this ``Executor`` instance. """
         return self._hosts
 
+    @property
+    def stats(self):
+        """ Final statistics of each host of the last run.
+
+        Represent as ``{ $host -> { $counter -> $count, ... }, ... }``,
+        or ``None`` if the ``Executor`` implementation does not report it.
+        """
+        return None
+
+    def bind(self, hosts, timeout=None):
+        """ Return a copy of this ``Executor`` instance on ``hosts``.
+
+        Options of the copy are the same as this instance, which were
+        validated once by ``__init__``, with ``timeout`` changed if given.
+
+        All runs of the copy (e.g.: batches of deploy, polls of stream)
+        share one deadline, ``timeout`` seconds after it was bound.
+        """
+        executor = copy.copy(self)
+        executor._slot = None
+        executor._hosts = hosts if isinstance(hosts, (tuple, list)) else [hosts]
+        if timeout != None:
+            executor._timeout = timeout
+        executor._deadline = (time.time() + executor._timeout
+                              if executor._timeout else None)
+        return executor
+
     def set_hosts(self, hosts):
         """ Temporary change host(s) of this ``Executor`` instance. """
         if self._slot == None:
@@ -59,6 +90,16 @@ class ExecutorPrototype(ABC):
         """ Invoke executor command module on remote host(s). """
         raise NotImplementedError
 
+    def stream_execute(self, cmd, interval=0, chunk=0):
+        """ Invoke executor command on remote host(s), yield outputs chunk by chunk.
+
+        Each chunk has the same form as ``raw_execute`` yields, with the
+        ``rtc`` is ``None`` until the last chunk of each host. Executors
+        which can not stream outputs yield the whole outputs of each host
+        as its only chunk.
+        """
+        return self.raw_execute(cmd)
+
     @abstractmethod
     def ping(self):
         """ Ping remote host(s) via executor. """
@@ -2,11 +2,14 @@
 
 from .consts import *
 
+from exe.exc import ExecutorTimeoutError
+
 
 __all__ = ["exec_success", "exec_failure", "execstate_name",
            "execstate_success", "execstate_failure", "execstate_announce",
            "decompose_exec_yielddata", "decompose_exec_returncontext",
-           "compose_exec_returncontext", "extract_return_state"]
+           "compose_exec_returncontext", "extract_return_state",
+           "collect_exec_yielddata"]
 
 
 def exec_success(return_context):
@@ -68,3 +71,17 @@ def compose_exec_returncontext(state, name, return_context):
 def extract_return_state(return_context):
     """ Extract return state from remote host's return context. """
     return return_context.pop(EXE_STATUS_ATTR)
+
+
+def collect_exec_yielddata(yield_datas):
+    """ Collect ``Executor``s yield data into one dict represent as
+    ``{host: context, ...}``, if the ``Executor`` timed out, hosts timed
+    out are collected with ``EXE_TIMEOUT`` state, and return the partial
+    results collected so far. """
+    results = {}
+    try:
+        for yield_data in yield_datas:
+            results.update(yield_data)
+    except ExecutorTimeoutError:
+        pass
+    return results
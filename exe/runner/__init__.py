@@ -13,6 +13,9 @@ from .execute import ExecuteRunner
 from .deploy import DeployRunner
 from .task import TaskRunner
 
+from . import sweeper   # register the sweeper task for celery beat
+from . import spill     # register the spill load task
+
 
 __all__ = ['AsyncRunner', 'Context', 'Job', 'JobQuerier', 'TargetRunner', 'TaskRunner', 
     'PingRunner', 'FacterRunner', 'ServiceRunner', 'ExecuteRunner', 'DeployRunner',
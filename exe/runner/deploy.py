@@ -7,97 +7,140 @@ from ._async import AsyncRunner
 from .context import Context
 
 from exe.executor.utils import *
+from exe.executor.consts import EXE_FAILED, EXE_TIMEOUT
 from exe.utils.err import excinst
 from exe.exc import JobNotSupportedError
 from exe.exc import ExecutorPrepareError
 from exe.exc import ExecutorDeployError
 from exe.exc import ExecutorNoMatchError
+from exe.exc import ExecutorTimeoutError
 
 
 LOG = logging.getLogger(__name__)
 
 
+## Consts ##
+BATCH_ABORT_NAME = "batch aborted"  # name of return data of aborted hosts
+BATCH_TIMEOUT_NAME = "batch timed out"  # name of return data of unfinished hosts
+
+
 class DeployRunner(Context):
     """ Execute deploy task on remote host(s). """
 
     __RUNNER_NAME__ = "deploy"
     __RUNNER_MUTEX_REQUIRED__ = True
 
-    def handle(ctx, targets, role, extra_vars, partial=None, run_async=True):
-        """ Handle remote deploy request. """
+    def handle(ctx, targets, role, extra_vars, partial=None,
+               batch_size=None, max_fail_percentage=None, run_async=True):
+        """ Handle remote deploy request.
+
+        With ``batch_size`` (count of hosts, or percentage of targets like
+        ``25%``), targets are deployed batch by batch, and the rest of
+        batches are aborted once the percentage of failed hosts of all
+        finished hosts of the job (all sub-tasks of fan-out job) is larger
+        than ``max_fail_percentage``, which is checked before each batch.
+        """
         if not run_async:   # This should never happen, but let's be safe
             raise JobNotSupportedError("deploy can not run under async mode")
         job = Job(targets, ctx.runner_name, ctx.runner_mutex,
-                  dict(role=role, extra_vars=extra_vars, partial=partial))
+                  dict(role=role, extra_vars=extra_vars, partial=partial,
+                       batch_size=batch_size,
+                       max_fail_percentage=max_fail_percentage))
         job.create(ctx.redis)
 
-        return job.associate_task(
-            _async_deploy.delay(job.dict_ctx, targets, role,
-                                extra_vars, partial), ctx.redis)
+        return ctx.dispatch(job, _async_deploy, targets, role,
+                            extra_vars, partial, batch_size,
+                            max_fail_percentage)
+
+
+def _batches(targets, batch_size):
+    """ Split targets into batches of ``batch_size`` (count or percentage). """
+    if not batch_size:
+        return [targets]
+    if isinstance(batch_size, str):
+        batch_size = -(-len(targets) * int(batch_size.rstrip('%')) // 100)
+    batch_size = max(int(batch_size), 1)
+    return [ targets[idx:idx + batch_size]
+             for idx in range(0, len(targets), batch_size) ]
+
+
+def _too_many_failed(progress, max_fail_percentage):
+    """ Whether failed hosts of all finished ones are more than expected. """
+    return progress['done'] and (progress['failed'] * 100.0 /
+                                 progress['done'] > max_fail_percentage)
 
 
 @AsyncRunner.task(bind=True, ignore_result=True,
                   base=Context, serializer='json')
-def _async_deploy(ctx, job_ctx, targets, role, extra_vars, partial):
+def _async_deploy(ctx, job_ctx, targets, role, extra_vars, partial,
+                  batch_size=None, max_fail_percentage=None):
     job = Job.load(job_ctx)
     job.bind(ctx.request.id)
 
     try:
         redis = _async_deploy.redis
+        job.open_writer(redis, **_async_deploy.writer_opts)
         executor = _async_deploy.executor(targets)
 
-        failed_targets = []
-        for yield_data in executor.deploy(role, extra_vars, partial):
-            target, context = decompose_exec_yielddata(yield_data)
-
-            # deploy returns:
-            #   {$host -> {EXE_STATUS_ATTR -> $state (int),
-            #              EXE_RETURN_ATTR -> $data (dict),
-            #              EXE_NAME_ATTR   -> $name (string)}
-            # when $host == EXE_ANNOUNCE_ATTR or
-            #      $host == EXE_ANNOUNCE_SUMMARY_ATTR
-            # means that message was an announce or summary without any
-            #   operate on remote host(s), just like a print statement
-            #   in your code
-            #
-            # and then, before push these data into redis, we compose
-            #   our executor return context as follow:
-            #
-            #   {$host -> {EXE_STATUS_ATTR -> $state (int),
-            #              EXE_RETURN_ATTR -> $description (string),
-            #              EXE_NAME_ATTR   -> $name (string)}
-            state, name, return_ctx = decompose_exec_returncontext(context)
-
-            # handle announce context
-            if execstate_announce(state):
-                _context = compose_exec_returncontext(state, name,
-                                                      execstate_name(state))
-                for target in targets:
-                    job.push_return_data(target, _context, redis)
-                continue
-
-            # handle success & failure context
-            if execstate_failure(state):
-                failed_targets.append(target)
-
-                _context = compose_exec_returncontext(
-                    state, name, executor.extract_return_error(return_ctx))
-            else:
-                _context = compose_exec_returncontext(state, name,
-                                                      execstate_name(state))
-            job.push_return_data(target, _context, redis)
+        stats = None
+        finished = 0
+        failed_targets = set()
+        progress = None
+        timeout = None
+        for batch in _batches(targets, batch_size):
+            if max_fail_percentage != None:
+                progress = job.load_job_progress(redis)
+                if _too_many_failed(progress, max_fail_percentage):
+                    break
+
+            executor.set_hosts(batch)
+            try:
+                _deploy_batch(job, executor, batch, role, extra_vars,
+                              partial, failed_targets, redis)
+            except ExecutorTimeoutError:    # the job deadline passed
+                timeout = str(excinst())
+                finished += len(batch)
+                break
+            finally:
+                executor.reset_hosts()
+
+            if executor.stats != None:
+                stats = stats or {}
+                stats.update(executor.stats)
+
+            finished += len(batch)
 
         msg = None
-        if failed_targets:
-            for target in targets:
-                failed = target in failed_targets
-                job.target_done(target, failed, redis)
-
+        if finished < len(targets):
+            aborted = targets[finished:]
+            _context = compose_exec_returncontext(
+                EXE_FAILED, BATCH_ABORT_NAME,
+                "not deployed, deploy timed out before" if timeout else
+                "not deployed, too many hosts failed before")
+            for target in aborted:
+                job.push_return_data(target, _context, redis)
+                job.target_done(target, True, redis)
+            if timeout:
+                msg = ("deploy aborted after <{0}> of <{1}> remote host(s) "
+                       "deployed, {2}".format(finished, len(targets),
+                                              timeout))
+            else:
+                msg = ("deploy aborted after <{0}> of <{1}> remote host(s) "
+                       "deployed, <{2}> of them got deploy errors which is "
+                       "more than <{3}%>".format(progress['done'],
+                                                 progress['total'],
+                                                 progress['failed'],
+                                                 max_fail_percentage))
+            failed_targets.update(aborted)
+        elif timeout:
+            msg = "deploy timed out, {0}".format(timeout)
+        elif failed_targets:
             msg = "<{0}> of <{1}> remote host(s) got deploy errors".format(
                 len(failed_targets), len(targets))
-        job.done(bool(failed_targets), msg, redis)
+        job.done(bool(failed_targets), msg, redis, stats)
 
-    except (ExecutorPrepareError, ExecutorDeployError, ExecutorNoMatchError):
+    except (ExecutorPrepareError, ExecutorDeployError,
+            ExecutorNoMatchError, ExecutorTimeoutError):
         msg = ("got executor error while invoke deploy tool, "
                "{0}".format(excinst()))
         LOG.error(msg)
@@ -107,3 +150,74 @@ def _async_deploy(ctx, job_ctx, targets, role, extra_vars, partial):
                "{0}".format(excinst()))
         LOG.error(msg)
         job.done(failed=True, errmsg=msg, redis=redis)
+
+
+def _deploy_batch(job, executor, batch, role, extra_vars, partial,
+                  failed_targets, redis):
+    """ Deploy on one batch of targets, failed ones added to ``failed_targets``.
+
+    Each target of the batch is marked done, if the deploy got error (e.g.:
+    timed out, the run was killed before any target finished the whole
+    deploy), targets not failed yet are marked as failed too, and the
+    error is raised.
+    """
+    try:
+        _deploy_batch_returns(job, executor, batch, role, extra_vars,
+                              partial, failed_targets, redis)
+    except:
+        if isinstance(excinst(), ExecutorTimeoutError):
+            _context = compose_exec_returncontext(
+                EXE_TIMEOUT, BATCH_TIMEOUT_NAME,
+                "deploy timed out before finished on this host")
+            for target in batch:
+                if target not in failed_targets:
+                    job.push_return_data(target, _context, redis)
+        failed_targets.update(batch)
+        raise
+    finally:
+        for target in batch:
+            job.target_done(target, target in failed_targets, redis)
+
+
+def _deploy_batch_returns(job, executor, batch, role, extra_vars, partial,
+                          failed_targets, redis):
+    """ Push return data of deploy on one batch of targets. """
+    for yield_data in executor.deploy(role, extra_vars, partial):
+        target, context = decompose_exec_yielddata(yield_data)
+
+        # deploy returns:
+        #   {$host -> {EXE_STATUS_ATTR -> $state (int),
+        #              EXE_RETURN_ATTR -> $data (dict),
+        #              EXE_NAME_ATTR   -> $name (string)}
+        # when $host == EXE_ANNOUNCE_ATTR or
+        #      $host == EXE_ANNOUNCE_SUMMARY_ATTR
+        # means that message was an announce or summary without any
+        #   operate on remote host(s), just like a print statement
+        #   in your code
+        #
+        # and then, before push these data into redis, we compose
+        #   our executor return context as follow:
+        #
+        #   {$host -> {EXE_STATUS_ATTR -> $state (int),
+        #              EXE_RETURN_ATTR -> $description (string),
+        #              EXE_NAME_ATTR   -> $name (string)}
+        state, name, return_ctx = decompose_exec_returncontext(context)
+
+        # handle announce context
+        if execstate_announce(state):
+            _context = compose_exec_returncontext(state, name,
+                                                  execstate_name(state))
+            for target in batch:
+                job.push_return_data(target, _context, redis)
+            continue
+
+        # handle success & failure context
+        if execstate_failure(state):
+            failed_targets.add(target)
+
+            _context = compose_exec_returncontext(
+                state, name, executor.extract_return_error(return_ctx))
+        else:
+            _context = compose_exec_returncontext(state, name,
+                                                  execstate_name(state))
+        job.push_return_data(target, _context, redis)
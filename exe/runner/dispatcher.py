@@ -0,0 +1,199 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import os
+import time
+import uuid
+import logging
+import threading
+import collections
+
+from exe.utils.err import excinst
+
+
+LOG = logging.getLogger(__name__)
+
+
+## Consts ##
+DISPATCH_COUNT = 512        # max events read by each XREAD of dispatcher
+DISPATCH_BLOCK = 5000       # max milliseconds each XREAD of dispatcher blocks
+DISPATCH_QUEUE_SIZE = 1024  # max events queued for each follow client
+DISPATCH_RETRY = 1          # seconds to wait before retry after redis error
+
+
+def _event_id(eid):
+    """ Convert redis stream id into comparable ``(ms, seq)`` tuple. """
+    ms, _, seq = eid.partition('-')
+    return int(ms), int(seq or 0)
+
+
+class Subscription(object):
+    """ Bounded event queue of one follow client. """
+
+    def __init__(self, key, offset, size=DISPATCH_QUEUE_SIZE):
+        """ Initialize Subscription instance. """
+        self._key = key
+        self._offset = offset
+        self._size = size
+        self._lagged = False
+
+        self._cond = threading.Condition()
+        self._events = collections.deque()
+
+    @property
+    def key(self):
+        """ The stream key this subscription follows. """
+        return self._key
+
+    @property
+    def offset(self):
+        """ Id of the last event queued for this subscription. """
+        return self._offset
+
+    @property
+    def lagged(self):
+        """ ``True`` if this subscription was dropped by the dispatcher. """
+        return self._lagged
+
+    def _put(self, eid, event):
+        """ Queue event for follow client, return ``False`` if queue full. """
+        with self._cond:
+            if len(self._events) >= self._size:
+                self._lagged = True
+                self._cond.notify()
+                return False
+            self._events.append((eid, event))
+            self._offset = eid
+            self._cond.notify()
+            return True
+
+    def get(self, timeout):
+        """ Return the next ``(eid, event)`` pair of this subscription.
+
+        Return ``None`` if no event arrives in ``timeout`` milliseconds, or
+        the subscription was dropped and every queued event was consumed.
+        """
+        with self._cond:
+            if not self._events and not self._lagged:
+                self._cond.wait(timeout / 1000.0)
+            if self._events:
+                return self._events.popleft()
+            return None
+
+
+class FollowDispatcher(object):
+    """ Dispatch job stream events to follow clients inside one process.
+
+    Instead of each follow client block on its own redis connection, the
+    dispatcher reads all followed job streams via one blocking ``XREAD``
+    inside one thread, and fans these events out to subscriptions, the
+    bounded in-memory event queue of each client.
+
+    A slow client whose queue is full gets dropped, the client should
+    report its last event id (``Subscription.offset``) as lag and stop,
+    which allows the remote side resume from that id later since all
+    events still kept inside the job stream.
+    """
+
+    def __init__(self, redis, queue_size=DISPATCH_QUEUE_SIZE):
+        """ Initialize FollowDispatcher instance. """
+        self._redis = redis
+        self._queue_size = queue_size
+
+        self._lock = threading.Condition()
+        self._subs = {}
+        self._thread = None
+
+        # writes to this stream wake up the blocking ``XREAD`` when new
+        #   subscription comes, read from a concrete id (set before the
+        #   first ``XREAD``) instead of ``$``, otherwise wakeups written
+        #   between two ``XREAD`` calls are missed
+        self._wakeup_key = "follow:{0}:{1}:wakeup".format(
+            os.getpid(), uuid.uuid4().hex)
+        self._wakeup_offset = None
+
+    def subscribe(self, key, offset):
+        """ Subscribe events after the event id ``offset`` of stream ``key``. """
+        sub = Subscription(key, offset, self._queue_size)
+        with self._lock:
+            self._subs.setdefault(key, []).append(sub)
+            if self._thread == None:
+                self._thread = threading.Thread(
+                    target=self._run, name="follow-dispatcher")
+                self._thread.daemon = True
+                self._thread.start()
+            self._lock.notify()
+        self._wakeup()
+        return sub
+
+    def unsubscribe(self, sub):
+        """ Remove subscription from the dispatcher. """
+        with self._lock:
+            self._remove(sub)
+
+    def _remove(self, sub):
+        """ Remove subscription, should be called with lock held. """
+        subs = self._subs.get(sub.key, [])
+        if sub in subs:
+            subs.remove(sub)
+        if not subs:
+            self._subs.pop(sub.key, None)
+
+    def _wakeup(self):
+        """ Wake up the dispatcher thread blocked by ``XREAD``. """
+        pipeline = self._redis.pipeline(False)
+        pipeline.xadd(self._wakeup_key, dict(wakeup=1), maxlen=1)
+        pipeline.expire(self._wakeup_key, DISPATCH_BLOCK // 1000 * 2)
+        pipeline.execute()
+
+    def _last_wakeup(self):
+        """ Id of the last event of the wakeup stream, ``0-0`` if empty. """
+        events = self._redis.xrevrange(self._wakeup_key, count=1)
+        return events[0][0] if events else "0-0"
+
+    def _streams(self):
+        """ Stream keys and offsets to read, block until any subscription. """
+        with self._lock:
+            while not self._subs:
+                self._lock.wait()
+            streams = dict([
+                (key, min([ s.offset for s in subs ], key=_event_id))
+                for key, subs in self._subs.items() ])
+        streams[self._wakeup_key] = self._wakeup_offset
+        return streams
+
+    def _dispatch(self, key, events):
+        """ Fan events of stream ``key`` out to subscriptions. """
+        with self._lock:
+            for sub in list(self._subs.get(key, [])):
+                offset = _event_id(sub.offset)
+                for eid, event in events:
+                    if _event_id(eid) <= offset:
+                        continue
+                    if not sub._put(eid, event):
+                        LOG.warning("follow client of <{0}> lagged at <{1}>, "
+                                    "dropped".format(key, sub.offset))
+                        self._remove(sub)
+                        break
+
+    def _run(self):
+        """ Dispatcher thread main loop. """
+        LOG.info("follow dispatcher started, pid <{0}>".format(os.getpid()))
+        while True:
+            streams = self._streams()
+            try:
+                if self._wakeup_offset == None:
+                    self._wakeup_offset = self._last_wakeup()
+                    streams[self._wakeup_key] = self._wakeup_offset
+                result = self._redis.xread(streams, count=DISPATCH_COUNT,
+                                           block=DISPATCH_BLOCK)
+            except:
+                LOG.error("follow dispatcher got redis error, "
+                          "{0}".format(excinst()))
+                time.sleep(DISPATCH_RETRY)
+                continue
+
+            for key, events in result or []:
+                if key == self._wakeup_key:
+                    self._wakeup_offset = events[-1][0]
+                    continue
+                self._dispatch(key, events)
@@ -9,6 +9,7 @@ from .context import Context
 from exe.executor.utils import *
 from exe.utils.err import excinst
 from exe.exc import ExecutorPrepareError, ExecutorNoMatchError
+from exe.exc import ExecutorTimeoutError
 
 
 LOG = logging.getLogger(__name__)
@@ -20,30 +21,48 @@ class ExecuteRunner(Context):
     __RUNNER_NAME__ = "execute"
     __RUNNER_MUTEX_REQUIRED__ = False
 
-    def handle(ctx, targets, command, run_async=False):
-        """ Handle remote cmd execution request. """
+    def handle(ctx, targets, command, run_async=False, timeout=None,
+               stream=False):
+        """ Handle remote cmd execution request.
+
+        Under block mode, return results collected within ``timeout``
+        seconds, see ``Context.executor``.
+
+        Under non-block mode with ``stream``, outputs are pushed chunk by
+        chunk while the command running, see ``stream_execute`` of the
+        executor.
+        """
         if not run_async:
-            return next(ctx.executor(targets).raw_execute(command), None)
-        job = Job(targets, ctx.runner_name, ctx.runner_mutex,
-                  dict(command=command))
+            return collect_exec_yielddata(
+                ctx.executor(targets, timeout).raw_execute(command))
+        params = dict(command=command)
+        if stream:
+            params['stream'] = True
+        job = Job(targets, ctx.runner_name, ctx.runner_mutex, params)
         job.create(ctx.redis)
 
-        return job.associate_task(
-            _async_execute.delay(job.dict_ctx, targets, command), ctx.redis)
+        return ctx.dispatch(job, _async_execute, targets, command, stream)
 
 
 @AsyncRunner.task(bind=True, ignore_result=True,
                   base=Context, serializer='json')
-def _async_execute(ctx, job_ctx, targets, command):
+def _async_execute(ctx, job_ctx, targets, command, stream=False):
     job = Job.load(job_ctx)
     job.bind(ctx.request.id)
 
     try:
         redis = _async_execute.redis
+        job.open_writer(redis, **_async_execute.writer_opts)
         executor = _async_execute.executor(targets)
 
+        if stream:
+            outputs = executor.stream_execute(command,
+                                              **_async_execute.stream_opts)
+        else:
+            outputs = executor.raw_execute(command)
+
         failed_targets = []
-        for yield_data in executor.raw_execute(command):
+        for yield_data in outputs:
             target, context = decompose_exec_yielddata(yield_data)
 
             # raw_execute returns:
@@ -51,8 +70,11 @@ def _async_execute(ctx, job_ctx, targets, command):
             #              'stdout' -> $stdout (string),
             #              'stderr' -> $stderr (string),
             #              'rtc'    -> $ret_code (int)}
-            # just push these context to redis
+            # just push these context to redis, under stream mode, the
+            # ``rtc`` is ``None`` until the last chunk of target
             job.push_return_data(target, context, redis)
+            if context.get('rtc') == None:
+                continue
 
             failed = execstate_failure(extract_return_state(context))
             if failed:
@@ -64,9 +86,9 @@ def _async_execute(ctx, job_ctx, targets, command):
         if failed_targets:
             msg = "<{0}> of <{1}> remote host(s) got execute errors".format(
                 len(failed_targets), len(targets))
-        job.done(bool(failed_targets), msg, redis)
+        job.done(bool(failed_targets), msg, redis, executor.stats)
 
-    except (ExecutorPrepareError, ExecutorNoMatchError):
+    except (ExecutorPrepareError, ExecutorNoMatchError, ExecutorTimeoutError):
         msg = ("got executor error while execute raw command, "
               " {0}").format(excinst())
         LOG.error(msg)
@@ -1,5 +1,6 @@
 # (c) 2016, Hao Feng <whisperaven@gmail.com>
 
+import time
 import logging
 
 from .jobs import Job
@@ -7,8 +8,10 @@ from ._async import AsyncRunner
 from .context import Context
 
 from exe.executor.utils import *
+from exe.executor.consts import EXE_STATUS_ATTR
 from exe.utils.err import excinst
 from exe.exc import ExecutorPrepareError, ExecutorNoMatchError
+from exe.exc import ExecutorTimeoutError
 
 
 LOG = logging.getLogger(__name__)
@@ -20,15 +23,47 @@ class FacterRunner(Context):
     __RUNNER_NAME__ = "facter"
     __RUNNER_MUTEX_REQUIRED__ = False
 
-    def handle(ctx, targets, run_async=False):
-        """ Handle remote facter request. """
+    def handle(ctx, targets, run_async=False, refresh=False, timeout=None):
+        """ Handle remote facter request.
+
+        Under block mode, return ``(result, age)`` pair, the ``result`` of
+        single target comes from the fact cache if the cached facts are
+        younger than ``facts_max_age`` and ``refresh`` is ``False``, the
+        ``age`` is seconds passed since the facts gathered, otherwise the
+        ``result`` contains results collected within ``timeout`` seconds.
+        """
         if not run_async:
-            return next(ctx.executor(targets).facter(), None)
+            return ctx._facter(targets, refresh, timeout)
         job = Job(targets, ctx.runner_name, ctx.runner_mutex)
         job.create(ctx.redis)
 
-        return job.associate_task(
-            _async_facter.delay(job.dict_ctx, targets), ctx.redis)
+        return ctx.dispatch(job, _async_facter, targets)
+
+    def _facter(ctx, targets, refresh=False, timeout=None):
+        """ Gather facts of targets under block mode via the fact cache. """
+        target = targets
+        if isinstance(targets, (list, tuple)):
+            target = targets[0] if len(targets) == 1 else None
+
+        cache = ctx.facts
+        if target != None and not refresh:
+            facts, age = cache.get(target)
+            if facts != None and age < ctx.cfg.facts_max_age:
+                return {target: facts}, age
+
+        result = collect_exec_yielddata(
+            ctx.executor(targets, timeout).facter())
+        if result:
+            _cache_facts(cache, [result])
+        return result, 0
+
+
+def _cache_facts(cache, results):
+    """ Put successful facter results into the fact cache one by one. """
+    for yield_data in results:
+        for target, context in yield_data.items():
+            if not execstate_failure(context.get(EXE_STATUS_ATTR)):
+                cache.put({target: context})
 
 
 @AsyncRunner.task(bind=True, ignore_result=True,
@@ -39,9 +74,12 @@ def _async_facter(ctx, job_ctx, targets):
 
     try:
         redis = _async_facter.redis
+        job.open_writer(redis, **_async_facter.writer_opts)
+        executor = _async_facter.executor(targets)
+        cache = _async_facter.facts
 
         failed_targets = []
-        for yield_data in _async_facter.executor(targets).facter():
+        for yield_data in executor.facter():
             target, context = decompose_exec_yielddata(yield_data)
 
             # facter returns:
@@ -49,6 +87,7 @@ def _async_facter(ctx, job_ctx, targets):
             #              'facts'         -> $fact_data (dict)}}
             # just push these context to redis
             job.push_return_data(target, context, redis)
+            _cache_facts(cache, [{target: context}])
 
             failed = execstate_failure(extract_return_state(context))
             if failed:
@@ -60,9 +99,9 @@ def _async_facter(ctx, job_ctx, targets):
         if failed_targets:
             msg = "<{0}> of <{1}> remote host(s) got facts errors".format(
                 len(failed_targets), len(targets))
-        job.done(bool(failed_targets), msg, redis)
+        job.done(bool(failed_targets), msg, redis, executor.stats)
 
-    except (ExecutorPrepareError, ExecutorNoMatchError):
+    except (ExecutorPrepareError, ExecutorNoMatchError, ExecutorTimeoutError):
         msg = ("got executor error while gathering facts, "
                "{0}").format(excinst())
         LOG.error(msg)
@@ -72,3 +111,37 @@ def _async_facter(ctx, job_ctx, targets):
                "{0}").format(excinst())
         LOG.error(msg)
         job.done(failed=True, errmsg=msg, redis=redis)
+
+
+@AsyncRunner.task(bind=True, ignore_result=True,
+                  base=Context, serializer='json')
+def _async_facts_refresh(ctx):
+    """ Refresh facts of hot hosts inside the fact cache.
+
+    Scheduled via celery beat every ``facts_refresh_interval`` seconds,
+    hosts queried via the fact cache within ``facts_hot_window`` seconds
+    are hot, facts of them are gathered again before they are older than
+    ``facts_max_age``, so queries of them never wait for live gathers.
+    """
+    cfg = _async_facts_refresh.cfg
+    cache = _async_facts_refresh.facts
+    now = time.time()
+
+    try:
+        hot = cache.hot(now - cfg.facts_hot_window)
+        stale = [ target for target, at in zip(hot, cache.gathered_at(hot))
+                  if at == None or now - at >= (cfg.facts_max_age -
+                                                cfg.facts_refresh_interval) ]
+        if stale:
+            _cache_facts(cache, _async_facts_refresh.executor(stale).facter())
+    except (ExecutorPrepareError, ExecutorNoMatchError, ExecutorTimeoutError):
+        LOG.error("got executor error while refresh facts, "
+                  "{0}".format(excinst()))
+        return
+    except:
+        LOG.error("got unexpected error while refresh facts, "
+                  "{0}".format(excinst()))
+        return
+
+    LOG.info("facts refresher done, <{0}> of <{1}> hot host(s) "
+             "refreshed".format(len(stale), len(hot)))
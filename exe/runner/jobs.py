@@ -1,53 +1,157 @@
 # (c) 2016, Hao Feng <whisperaven@gmail.com>
 
+import re
 import time
 import uuid
 import json
 import copy
 import logging
-
-from redis import WatchError
+import threading
+import collections
 
 from .context import Context
+from .dispatcher import FollowDispatcher
+from .spill import load_spilled
 
 from exe.exc import JobConflictError, JobNotExistsError, JobDeleteError
+from exe.exc import JobQueryError, JobBusyError
+from exe.utils.err import excinst
+from exe.utils.codec import PayloadCodec, decode
 from exe.executor.utils import *
 from exe.executor.consts import *
 
 LOG = logging.getLogger(__name__)
 
 
+## Consts ##
+LOAD_CHUNK = 500    # max commands inside one pipeline for bulk loading
+FILTER_CHUNK = 500  # min taskids scanned by each round of filtered job list
+WRITER_MAX_EVENTS = 64  # max buffered events before writer flush
+WRITER_INTERVAL = 200   # max milliseconds events buffered inside writer
+WRITER_RETRY = 1        # min seconds before retry a failed flush
+
+STREAM_MAXLEN = 100000  # approximate max events kept inside job stream
+STREAM_BEGIN = "0-0"    # event id before the first event of job stream
+STREAM_ID_RE = re.compile(r"^\d+(-\d+)?$")
+FOLLOW_BLOCK = 5000     # max milliseconds follow client waits for event
+EXPIRE_GRACE = 86400    # seconds job keys kept after the sweeper should sweep
+
+COUNTER_PREFIX = "count:"   # prefix of per-status counter fields of job hash
+COUNTER_STATES = [ s for s in EXE_STATUS_MAP if s != EXE_ANNOUNCE ]
+
+DEFAULT_CODEC = PayloadCodec()              # codec of return data
+BLOB_CODEC = PayloadCodec(threshold=0)      # codec of compacted job blob
+
+# Claim all meta keys (KEYS) of job with startat (ARGV[1]) if none of them
+#   exists, otherwise return indexes (1-based) of these exist keys
+MUTEX_SCRIPT = """
+local conflicts = {}
+for idx, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        conflicts[#conflicts + 1] = idx
+    end
+end
+if #conflicts == 0 then
+    for _, key in ipairs(KEYS) do
+        redis.call('HSET', key, 'startat', ARGV[1])
+    end
+end
+return conflicts
+"""
+
+
+def _resume(first, events):
+    """ Yield ``first`` and then the rest of generator ``events``.
+
+    Close this generator closes ``events`` too, e.g.: the client of
+    follow mode was gone.
+    """
+    try:
+        yield first
+        yield from events
+    finally:
+        events.close()
+
+
 class JobQuerier(Context):
     """ Query information about Job(s) from redis. """
 
     __RUNNER_NAME__ = "job"
     __RUNNER_MUTEX_REQUIRE__ = False
 
-    def handle(ctx, jid=None, outputs=False,
-               follow=False, detail=False, delete=False):
-        """ Handle job query request. """
+    _dispatcher = None
+    _dispatcher_lock = threading.Lock()
+
+    _followers = 0      # follow clients being served by this process
+    _followers_lock = threading.Lock()
+
+    @property
+    def dispatcher(ctx):
+        """ The ``FollowDispatcher`` shared by all follow clients of process. """
+        with JobQuerier._dispatcher_lock:
+            if JobQuerier._dispatcher == None:
+                JobQuerier._dispatcher = FollowDispatcher(
+                    ctx.redis, ctx.cfg.follow_queue_size)
+        return JobQuerier._dispatcher
+
+    def handle(ctx, jid=None, outputs=False, follow=False, detail=False,
+               delete=False, limit=0, cursor=None, since=None, until=None,
+               start=None, progress=False, hosts=None, host=None, offset=0,
+               operate=None, state=None, full=False):
+        """ Handle job query request.
+
+        When list jobs (no ``jid`` given), return a pair which contains the
+        cursor of next page (``None`` means no more pages) and the list of
+        jids or a generator which yield the detail of each job, jobs can be
+        filtered by ``operate``, ``state`` and ``host`` (see ``Job.index``).
+
+        When query job in follow mode, job events after the event id
+        ``start`` are replayed, by default only new events are followed,
+        ``JobBusyError`` raised if there are too many follow clients.
+
+        When query job with ``progress``, only the job state and progress
+        counters are returned, which costs one ``HMGET``.
+
+        Return data can be limited to targets inside ``hosts``, and each
+        of them limited to ``limit`` items right after ``offset``. When
+        ``host`` given, return data and counters of that host are returned,
+        with ``full``, oversized return data capped before stored are
+        replaced by the full ones (see ``SpillStore``).
+        """
         redis = ctx.redis
 
         # Job List
         if not jid:
-            jids = [ j.split(':')[1] for j in redis.keys(Job._key('*')) ]
+            jids, cursor = Job.index(redis, limit, cursor, since, until,
+                                     operate, state, host)
             if not detail:   # list for ids without details
-                return jids 
-            jobs = []
-            for jid in jids: # list for detail of each job
-                job = Job.load_task(jid, redis)
-                if not job:
-                    LOG.warning("bad job <{0}> in redis, "
-                                "missing context".format(jid))
-                    continue
-                jobs.append(job.ctx)
-            return jobs
+                return cursor, jids
+            return cursor, ctx._iter_jobs(jids, redis)
+
+        # Job Progress by JID
+        if progress and not (delete or follow or outputs):
+            return Job.load_progress(jid, redis)
 
         # Job Query/Delete by JID
         job = Job.load_task(jid, redis)
         if not job:
             raise JobNotExistsError("no such jid <{0}>".format(jid))
 
+        if host:
+            if host not in job._targets:
+                raise JobNotExistsError("no such host <{0}> in job "
+                                        "<{1}>".format(host, jid))
+            data = job.load_host(host, redis, offset, limit)
+            if full:
+                load_spilled(ctx, data[EXE_RETURN_ATTR])
+            return data
+
+        if hosts:
+            unknown = set(hosts).difference(job._targets)
+            if unknown:
+                raise JobQueryError("no such host(s) <{0}> in job <{1}>".format(
+                    ','.join(sorted(unknown)), jid))
+
         if delete:
             if job._state == Job.STATE_RUNNING:
                 raise JobDeleteError("cannot delete a running job, "
@@ -55,13 +159,62 @@ class JobQuerier(Context):
             job.sweep(redis)
             return ""   # Delete API return 204 no content
 
+        # capture the job stream offset before load data, which makes
+        #   sure no event will be missed between them
+        replay = start != None
+        if follow:
+            if replay:
+                start = Job.parse_event_id(start)
+            else:
+                start = job.last_event(redis)
+
         if outputs:
-            job.load_data(redis)
+            job.load_data(redis, targets=hosts, offset=offset, limit=limit)
 
         if not follow:
             return job.ctx
         else:
-            return job.follow(redis)
+            return ctx._follow(job, redis, start, replay)
+
+    def _follow(ctx, job, redis, start, replay):
+        """ Return generator of follow events, see ``Job.follow``.
+
+        The follow slot is taken (or ``JobBusyError`` raised) before return,
+        which makes the error responded before the stream started, the
+        slot is released once the returned generator closed.
+        """
+        events = ctx._iter_follow(job, redis, start, replay)
+        return _resume(next(events), events)
+
+    def _iter_follow(ctx, job, redis, start, replay):
+        """ Yield events of ``Job.follow`` inside one follow slot.
+
+        Each follow client holds one api server thread until the job done,
+        which can not be served without it by cherrypy, at most
+        ``follow_max_clients`` of them are served by each process, which
+        keeps the rest threads of the pool for other requests.
+        """
+        with JobQuerier._followers_lock:
+            if JobQuerier._followers >= int(ctx.cfg.follow_max_clients):
+                raise JobBusyError("too many follow clients, at most <{0}> "
+                                   "of them are served, try again later"
+                                   "".format(ctx.cfg.follow_max_clients))
+            JobQuerier._followers += 1
+        try:
+            for event in job.follow(redis, ctx.dispatcher, start, replay):
+                yield event
+        finally:
+            with JobQuerier._followers_lock:
+                JobQuerier._followers -= 1
+
+    def _iter_jobs(ctx, jids, redis):
+        """ Yield detail of each job for job list in stream mode. """
+        for jid, job in Job.load_tasks(jids, redis):
+            if not job:
+                LOG.warning("bad job <{0}> in redis, "
+                            "missing context".format(jid))
+                continue
+            yield job.ctx
 
 
 class Job(object):
@@ -87,6 +240,12 @@ class Job(object):
             the celery task id of this job
         9. error
             error message of this job
+        10. progress
+            counters of finished hosts and return data of each state
+        11. stats
+            final statistics of each host reported by executor
+        12. shards
+            count of sub-tasks if the job was fanned out, see ``Job.fanout``
 
     For more detail about their represents in redis, see doc of ``Job.create``.
     """
@@ -94,15 +253,21 @@ class Job(object):
     STATE_DONE = 0
     STATE_RUNNING = 1
     STATE_FAILURE = 2
+    STATES = (STATE_DONE, STATE_RUNNING, STATE_FAILURE)
 
     DONE    = "__DONE__"
     FAILURE = "__FAILURE__"
 
+    EVENT_ID = "__EVENT_ID__"
+    LAGGED   = "__LAGGED__"
+
     def __init__(self, targets, operate, mutex=True, 
             operate_args={}, startat=0, utag=None,
-            state=None, taskid=None, error=""):
+            state=None, taskid=None, error="", shards=0, shard=None):
         """ Initialize Job instance. """
         self._id = taskid
+        self._shards = shards   # count of sub-tasks of fan-out job
+        self._shard  = shard    # index of sub-task, ``None`` for the job
 
         self._op      = operate
         self._opargs  = operate_args
@@ -114,6 +279,13 @@ class Job(object):
         self._rdata = {}     # for store return data of job
         self._error = error  # for store error message of job
 
+        self._writer = None  # for buffer return data of job
+        self._codec  = DEFAULT_CODEC  # for encode return data of job
+        self._spill  = None  # for cap oversized return data of job
+        self._compacted = False # return data was compacted or not
+        self._progress = None   # progress counters of job
+        self._stats    = None   # final statistics of job
+
         if not mutex:
             self._op = ':'.join([self._op, self._random_tag])
         if not self._startat:
@@ -134,18 +306,86 @@ class Job(object):
     @classmethod
     def load_task(cls, taskid, redis):
         """ Create job context instance by load job context from redis. """
-        t = redis.hgetall(cls._key(taskid))
+        return cls._load_hash(taskid, redis.hgetall(cls._key(taskid)))
+
+    @classmethod
+    def load_tasks(cls, taskids, redis, chunk=LOAD_CHUNK):
+        """ Yield ``(taskid, job)`` pairs by load job contexts from redis.
+
+        Job contexts are fetched via redis pipeline, each pipeline contains
+        at most ``chunk`` commands, which means one round trip per ``chunk``
+        jobs instead of one round trip per job.
+
+        The ``job`` will be empty if that job not exists.
+        """
+        for idx in range(0, len(taskids), chunk):
+            _taskids = taskids[idx:idx + chunk]
+
+            pipeline = redis.pipeline(False)
+            for taskid in _taskids:
+                pipeline.hgetall(cls._key(taskid))
+
+            for taskid, t in zip(_taskids, pipeline.execute()):
+                yield taskid, cls._load_hash(taskid, t)
+
+    @classmethod
+    def _load_hash(cls, taskid, t):
+        """ Create job context instance with job context loaded from redis. """
         if not t:
             return t
 
-        return cls(**dict(targets      = json.loads(t.pop('targets')),
-                          operate      = t.pop('operate'),
-                          operate_args = json.loads(t.pop('operate_args')),
-                          startat      = int(t.pop('startat')),
-                          utag         = t.pop('utag'),
-                          state        = int(t.pop('state')),
-                          taskid       = taskid,
-                          error        = t.pop('error')))
+        job = cls(**dict(targets      = json.loads(t.pop('targets')),
+                         operate      = t.pop('operate'),
+                         operate_args = json.loads(t.pop('operate_args')),
+                         startat      = int(t.pop('startat')),
+                         utag         = t.pop('utag'),
+                         state        = int(t.pop('state')),
+                         taskid       = taskid,
+                         error        = t.pop('error'),
+                         shards       = int(t.pop('shards', 0))))
+        t.pop('shards_pending', None)
+        job._compacted = bool(int(t.pop('compacted', 0)))
+        job._stats = json.loads(t.pop('stats', "null"))
+        job._progress = cls._parse_progress(t)
+        return job
+
+    @classmethod
+    def load_progress(cls, taskid, redis):
+        """ Load job state and progress counters via one ``HMGET``. """
+        fields = ['state', 'hosts_total', 'hosts_done', 'hosts_failed']
+        fields += [ cls._counter_field(s) for s in COUNTER_STATES ]
+
+        t = dict(zip(fields, redis.hmget(cls._key(taskid), fields)))
+        if t['state'] == None:
+            raise JobNotExistsError("no such jid <{0}>".format(taskid))
+        return dict(state=int(t.pop('state')),
+                    progress=cls._parse_progress(t))
+
+    @staticmethod
+    def _parse_progress(t):
+        """ Parse progress counters from fields of job hash.
+
+        The progress represent as:
+            {
+                'total'  -> $count of target hosts
+                'done'   -> $count of finished hosts (include failed ones)
+                'failed' -> $count of failed hosts
+                'status' -> { $state -> $count of return data, ... }
+            }
+        """
+        status = {}
+        for field, val in t.items():
+            if field.startswith(COUNTER_PREFIX) and val != None:
+                status[field[len(COUNTER_PREFIX):]] = int(val)
+        return dict(total  = int(t.get('hosts_total') or 0),
+                    done   = int(t.get('hosts_done') or 0),
+                    failed = int(t.get('hosts_failed') or 0),
+                    status = status)
+
+    @staticmethod
+    def _counter_field(state):
+        """ Format field name of job hash which counts return data of state. """
+        return "{0}{1}".format(COUNTER_PREFIX, state)
 
     @property
     def dict_ctx(self):
@@ -158,7 +398,9 @@ class Job(object):
                     utag         = self._utag,
                     state        = self._state,
                     taskid       = self._id,
-                    error        = self._error)
+                    error        = self._error,
+                    shards       = self._shards,
+                    shard        = self._shard)
 
     @property
     def ctx(self):
@@ -166,7 +408,10 @@ class Job(object):
         ctx = copy.deepcopy(self.dict_ctx)
         ctx.pop('mutex', None)
         ctx.pop('utag', None)
+        ctx.pop('shard', None)
         ctx['operate'] = self.operate
+        ctx['progress'] = self._progress
+        ctx['stats'] = self._stats
         ctx.update({EXE_RETURN_ATTR: self._rdata})
         return ctx
 
@@ -184,6 +429,327 @@ class Job(object):
         """
         return "job:{0}".format(taskid)
 
+    @staticmethod
+    def _backfill_key():
+        """ Format redis key of the backfill mark of job indexes.
+
+        Full key name example:
+            jobs:backfilled -> $timestamp (set after ``Job.backfill`` done)
+        """
+        return "jobs:backfilled"
+
+    @staticmethod
+    def _index_key():
+        """ Format redis key of the job index.
+
+        Full key name example:
+            jobs:index (sorted set of $taskid scored by $startat)
+        """
+        return "jobs:index"
+
+    @staticmethod
+    def _parse_cursor(cursor):
+        """ Parse the job list cursor into ``(startat, taskid)`` pair. """
+        try:
+            startat, taskid = cursor.split(':', 1)
+            return int(startat), taskid
+        except (AttributeError, ValueError):
+            raise JobQueryError("bad cursor <{0}>".format(cursor))
+
+    @staticmethod
+    def _operate_key(operate):
+        """ Format redis key of the job index of given operation.
+
+        Full key name example:
+            jobs:operate:deploy (sorted set of $taskid scored by $startat)
+        """
+        return "jobs:operate:{0}".format(operate)
+
+    @staticmethod
+    def _state_key(state):
+        """ Format redis key of the job index of given job state.
+
+        Full key name example:
+            jobs:state:1 (sorted set of $taskid scored by $startat)
+        """
+        return "jobs:state:{0}".format(state)
+
+    @staticmethod
+    def _host_key(fqdn):
+        """ Format redis key of the job index of given host.
+
+        Full key name example:
+            jobs:host:karazhan.vm.0ops.io (sorted set of $taskid scored
+                                           by $startat)
+        """
+        return "jobs:host:{0}".format(fqdn)
+
+    @classmethod
+    def index(cls, redis, limit=0, cursor=None, since=None, until=None,
+              operate=None, state=None, host=None):
+        """ List taskids from the job index ordered by their ``startat``.
+
+        Return a pair which contains the taskids and the cursor for fetch
+        the next page, the cursor will be ``None`` if no more pages.
+
+        The cursor represent as ``$startat:$taskid`` of the last job inside
+        the current page, members share the same score inside redis sorted
+        set are ordered lexicographically, so the next page begins right
+        after the cursor member, which keeps the page stable even if jobs
+        are created or deleted between two requests.
+
+        The cost of each call depends on ``limit``, not the job count nor
+        the size of the redis keyspace.
+
+        Jobs can be filtered by ``operate``, ``state`` and ``host``, each
+        filter has its own index (a sorted set scored by ``startat`` just
+        like the job index), the smallest of them (counted inside the time
+        range) is scanned and the others are checked via ``ZSCORE``, job
+        contexts are never loaded for filtering.
+        """
+        if state != None and state not in (Job.STATE_DONE, Job.STATE_RUNNING,
+                                           Job.STATE_FAILURE):
+            raise JobQueryError("bad job state <{0}>".format(state))
+
+        keys = []
+        if operate:
+            keys.append(cls._operate_key(operate))
+        if state != None:
+            keys.append(cls._state_key(state))
+        if host:
+            keys.append(cls._host_key(host))
+
+        if len(keys) > 1:
+            pipeline = redis.pipeline(False)
+            for key in keys:
+                pipeline.zcount(key, "-inf" if since is None else since,
+                                "+inf" if until is None else until)
+            keys = [ key for _, key in sorted(zip(pipeline.execute(), keys)) ]
+        key, filters = (keys[0], keys[1:]) if keys else (cls._index_key(), [])
+
+        num = (limit + 1) if limit else None
+        if filters and num:
+            num = max(num, FILTER_CHUNK)
+
+        entries = []
+        while True:
+            page = cls._range(redis, key, num, cursor, since, until)
+            more = num and len(page) >= num
+            if page:
+                cursor = "{0}:{1}".format(int(page[-1][1]), page[-1][0])
+            if filters:
+                page = cls._filter(redis, page, filters)
+            entries += page
+            if not more or (limit and len(entries) > limit):
+                break
+
+        cursor = None
+        if limit and len(entries) > limit:
+            entries = entries[:limit]
+            cursor = "{0}:{1}".format(int(entries[-1][1]), entries[-1][0])
+
+        return [ taskid for taskid, _ in entries ], cursor
+
+    @classmethod
+    def backfill(cls, redis, chunk=LOAD_CHUNK):
+        """ Index jobs created before the job indexes existed.
+
+        Job keys are found via ``SCAN``, each job not inside the job index
+        is added into the job index and the indexes of its operation, state
+        and targets (scored by its ``startat``), finished ones are also
+        queued for compaction, which makes them expire by the retention
+        like other jobs.
+
+        Runs once, the ``jobs:backfilled`` key is set after done, return
+        count of jobs indexed, ``None`` if it was done before.
+        """
+        if redis.exists(cls._backfill_key()):
+            return None
+
+        indexed = 0
+        taskids = []
+        for key in redis.scan_iter(match=cls._key("*"), count=chunk):
+            if key.count(':') != 1:     # other keys of job, e.g.: hosts
+                continue
+            taskids.append(key.split(':', 1)[1])
+            if len(taskids) >= chunk:
+                indexed += cls._backfill(redis, taskids)
+                taskids = []
+        if taskids:
+            indexed += cls._backfill(redis, taskids)
+
+        redis.set(cls._backfill_key(), int(time.time()))
+        return indexed
+
+    @classmethod
+    def _backfill(cls, redis, taskids):
+        """ Index jobs of ``taskids`` which are not indexed yet. """
+        fields = ['startat', 'operate', 'state', 'targets']
+
+        pipeline = redis.pipeline(False)
+        for taskid in taskids:
+            pipeline.hmget(cls._key(taskid), fields)
+            pipeline.zscore(cls._index_key(), taskid)
+        results = pipeline.execute()
+
+        indexed = 0
+        pipeline = redis.pipeline(False)
+        for idx, taskid in enumerate(taskids):
+            t = dict(zip(fields, results[idx * 2]))
+            if results[idx * 2 + 1] != None or t['startat'] == None:
+                continue
+            try:
+                startat = int(t['startat'])
+                state = int(t['state'])
+                targets = json.loads(t['targets'] or "[]")
+            except (TypeError, ValueError):
+                LOG.warning("bad job <{0}> in redis, not indexed".format(
+                    taskid))
+                continue
+
+            member = {taskid: startat}
+            pipeline.zadd(cls._index_key(), member)
+            if t['operate']:
+                pipeline.zadd(cls._operate_key(t['operate'].split(':')[0]),
+                              member)
+            pipeline.zadd(cls._state_key(state), member)
+            for target in targets:
+                pipeline.zadd(cls._host_key(target), member)
+            if state != Job.STATE_RUNNING:
+                pipeline.zadd(cls._compact_key(), {taskid: int(time.time())})
+            indexed += 1
+        pipeline.execute()
+        return indexed
+
+    @classmethod
+    def _range(cls, redis, key, num=None, cursor=None, since=None, until=None):
+        """ Range ``(taskid, startat)`` pairs of job index ``key``.
+
+        At least ``num`` pairs (or all of them if ``None``) right after
+        ``cursor`` are returned, see ``Job.index`` for the cursor, the
+        lower bound is the larger one of ``cursor`` and ``since``.
+        """
+        lower = "-inf" if since is None else since
+        upper = "+inf" if until is None else until
+
+        pipeline = redis.pipeline(False)
+        if cursor:
+            startat, last = cls._parse_cursor(cursor)
+            pipeline.zrangebyscore(key, startat, startat, withscores=True)
+            if since is None or since <= startat:
+                lower = "({0}".format(startat)
+        pipeline.zrangebyscore(key, lower, upper, start=0 if num else None,
+                               num=num, withscores=True)
+        results = pipeline.execute()
+
+        entries = results.pop()
+        if cursor:
+            inrange = ((since is None or startat >= since) and
+                       (until is None or startat <= until))
+            entries = [ e for e in results.pop()
+                        if inrange and e[0] > last ] + entries
+        return entries
+
+    @staticmethod
+    def _filter(redis, entries, keys):
+        """ Filter ``(taskid, startat)`` pairs which exists in all ``keys``. """
+        if not entries:
+            return entries
+        pipeline = redis.pipeline(False)
+        for taskid, _ in entries:
+            for key in keys:
+                pipeline.zscore(key, taskid)
+        scores = pipeline.execute()
+
+        n = len(keys)
+        return [ e for idx, e in enumerate(entries)
+                 if None not in scores[idx * n:(idx + 1) * n] ]
+
+    @staticmethod
+    def _blob_key(taskid):
+        """ Format redis key of the job blob with given taskid.
+
+        Full key name example:
+            job:$taskid:blob -> {
+                $fqdn -> $compressed_return_data_list (of compacted job)
+                ...
+            }
+        """
+        return "job:{0}:blob".format(taskid)
+
+    @staticmethod
+    def _compact_key():
+        """ Format redis key of the compaction queue.
+
+        Full key name example:
+            jobs:compact (sorted set of $taskid scored by finish timestamp)
+        """
+        return "jobs:compact"
+
+    @staticmethod
+    def _expire_key():
+        """ Format redis key of the expiration queue.
+
+        Full key name example:
+            jobs:expire (sorted set of $taskid scored by expire timestamp)
+        """
+        return "jobs:expire"
+
+    @staticmethod
+    def _hosts_key(taskid):
+        """ Format redis key of the per-host counters with given taskid.
+
+        Full key name example:
+            job:$taskid:hosts -> {
+                $fqdn          -> Job.STATE_DONE or Job.STATE_FAILURE
+                $fqdn:$state   -> $count of return data of that state
+            }
+        """
+        return "job:{0}:hosts".format(taskid)
+
+    @staticmethod
+    def _shards_key(taskid):
+        """ Format redis key of the sub-task results of fan-out job.
+
+        Full key name example:
+            job:$taskid:shards -> {
+                $shard -> json.dumps({failed, error, stats})
+            }
+        """
+        return "job:{0}:shards".format(taskid)
+
+    @staticmethod
+    def _indexes_key(taskid):
+        """ Format redis key of the index entries of finished job.
+
+        Written by ``Job.compact`` without ttl, which outlives the job
+        context, the sweeper can still remove the job from indexes after
+        the job context expired by itself.
+
+        Full key name example:
+            job:$taskid:indexes -> {
+                'operate' -> $operate
+                'targets' -> json.dumps($targets)
+            }
+        """
+        return "job:{0}:indexes".format(taskid)
+
+    @staticmethod
+    def _stream_key(taskid):
+        """ Format redis key of the job stream with given taskid.
+
+        Full key name example:
+            job:$taskid:events (capped redis stream of job events)
+        """
+        return "job:{0}:events".format(taskid)
+
+    @staticmethod
+    def parse_event_id(eid):
+        """ Validate the job stream event id given by client. """
+        if not STREAM_ID_RE.match(eid or ""):
+            raise JobQueryError("bad event id <{0}>".format(eid))
+        return eid
+
     @property
     def meta_keys(self):
         """ Format redis keys for all meta data. """
@@ -218,14 +784,88 @@ class Job(object):
         """
         return "{0}:{1}:{2}:data".format(fqdn, self._op, self._utag)
 
-    def load_data(self, redis):
-        """ Load all return data from redis. """
-        for key in self.data_keys:
-            target = key.split(':')[0]
-            rdata  = redis.lrange(key, 0, -1)
+    def load_data(self, redis, chunk=LOAD_CHUNK, targets=None,
+                  offset=0, limit=0):
+        """ Load return data from redis.
+
+        Only return data of ``targets`` (default all targets) are loaded,
+        and each of them contains at most ``limit`` (0 for no limit) items
+        right after ``offset``, which fetched via ranged ``LRANGE``.
+
+        Like ``Job.load_tasks``, data keys are fetched via redis pipeline
+        with at most ``chunk`` commands each round trip.
 
-            self._rdata.update(
-                {target: [ json.loads(retval) for retval in rdata ]})
+        If the job was compacted, load return data from the job blob, only
+        the blob fields of ``targets`` are fetched and decoded.
+        """
+        if targets == None:
+            targets = self._targets
+        stop = (offset + limit) if limit else None
+
+        for idx in range(0, len(targets), chunk):
+            _targets = targets[idx:idx + chunk]
+
+            if self._compacted:
+                blobs = redis.hmget(self._blob_key(self._id), _targets)
+                for target, blob in zip(_targets, blobs):
+                    rdata = decode(blob) if blob else []
+                    self._rdata[target] = rdata[offset:stop]
+                continue
+
+            pipeline = redis.pipeline(False)
+            for target in _targets:
+                pipeline.lrange(self._data_key(target), offset,
+                                (stop - 1) if stop else -1)
+
+            for target, rdata in zip(_targets, pipeline.execute()):
+                self._rdata.update(
+                    {target: [ decode(retval) for retval in rdata ]})
+
+    def load_host(self, target, redis, offset=0, limit=0):
+        """ Load return data and counters of one target via one pipeline.
+
+        The return data contains at most ``limit`` (0 for no limit) items
+        right after ``offset``, the result represent as:
+            {
+                'target'      -> $fqdn
+                'state'       -> Job.STATE_* of target, None if not done
+                'status'      -> { $state -> $count of return data, ... }
+                'total'       -> $count of all return data of target
+                'offset'      -> $offset
+                'return_data' -> [ $return_data, ... ]
+            }
+        """
+        stop = (offset + limit) if limit else None
+        fields = [target] + [ "{0}:{1}".format(target, s)
+                              for s in COUNTER_STATES ]
+
+        pipeline = redis.pipeline(False)
+        pipeline.hmget(self._hosts_key(self._id), fields)
+        if self._compacted:
+            pipeline.hget(self._blob_key(self._id), target)
+        else:
+            pipeline.llen(self._data_key(target))
+            pipeline.lrange(self._data_key(target), offset,
+                            (stop - 1) if stop else -1)
+        results = pipeline.execute()
+
+        counters = results.pop(0)
+        if self._compacted:
+            rdata = decode(results[0]) if results[0] else []
+            total, rdata = len(rdata), rdata[offset:stop]
+        else:
+            total, rdata = results
+            rdata = [ decode(retval) for retval in rdata ]
+
+        state = counters.pop(0)
+        status = dict([ (str(s), int(val))
+                        for s, val in zip(COUNTER_STATES, counters) if val ])
+        return {'target': target,
+                'state' : int(state) if state != None else None,
+                'status': status,
+                'total' : total,
+                'offset': offset,
+                EXE_RETURN_ATTR: rdata}
 
     def create(self, redis):
         """ Create job by create job context in redis.
@@ -233,8 +873,10 @@ class Job(object):
         Each job will create at least ``len(hosts)`` meta keys, job conflict
         dectect is done by redis key exists check of all job meta keys.
 
-        If no conflict, job context (the ``meta_keys``) will created via redis
-        pipeline to avoid operate confilct with others.
+        Both conflict detect and meta keys creation are done by one lua
+        script (``MUTEX_SCRIPT``) inside redis server, which runs atomically
+        and costs only one round trip no matter how many hosts given, if
+        there are conflicts, none of these meta keys will be created.
 
         At this point, each of these meta keys value will be a redis hash:
             $fqdn:$op:meta -> { 'startat': self._startat } (mutex job)
@@ -249,31 +891,21 @@ class Job(object):
             $fqdn:$op:data -> [$return_data, $return_data, ...] (mutex job)
             $fqdn:$op:$uuid:data -> [$return_data, $return_data, ...]
         """
-        pipeline = redis.pipeline()
-        try:
-            pipeline.watch(self.meta_keys)
-            for key in self.meta_keys:
-                if pipeline.exists(key):
-                    raise JobConflictError("operate conflict, job already "
-                                           "running on some host(s)")
-
-            LOG.debug("going to create job meta data "
-                      "keys <{0}>".format(';'.join(self.meta_keys)))
-
-            pipeline.multi()
-            for key in self.meta_keys:
-                pipeline.hmset(key, dict(startat=self._startat))
-            pipeline.execute()
-
-            LOG.info("job meta data create finished, "
-                     "keys <{0}>".format(';'.join(self.meta_keys)))
-
-        except WatchError:
-            LOG.info("conflict detected on job meta data "
-                     "creation <{0}>".format(';'.join(self.meta_keys)))
-            raise JobConflictError("operate conflict, try again later")
-        finally:
-            pipeline.reset()
+        LOG.debug("going to create job meta data "
+                  "keys <{0}>".format(';'.join(self.meta_keys)))
+
+        conflicts = redis.register_script(MUTEX_SCRIPT)(
+            keys=self.meta_keys, args=[self._startat])
+        if conflicts:
+            conflicts = [ self._targets[idx - 1] for idx in conflicts ]
+            LOG.info("conflict detected on job meta data creation, "
+                     "host(s) <{0}>".format(';'.join(conflicts)))
+            raise JobConflictError("operate conflict, job already running "
+                                   "on host(s) <{0}>".format(
+                                       ','.join(conflicts)))
+
+        LOG.info("job meta data create finished, "
+                 "keys <{0}>".format(';'.join(self.meta_keys)))
 
     def associate_task(self, task, redis):
         """ Associate job context with celery AsyncResult.
@@ -295,8 +927,16 @@ class Job(object):
                 utag    -> $uuid
                 startat -> $timestamp
                 error   -> "" (empty string)
+                hosts_total  -> len(targets)
+                hosts_done   -> 0
+                hosts_failed -> 0
+                shards         -> $count (fan-out job only)
+                shards_pending -> $count (fan-out job only)
             }
 
+        The ``hosts_*`` and ``count:$state`` counters are updated while
+        return data pushed (see ``Job.push_return_data``).
+
         And update each of meta keys from:
             $fqdn:$op:meta -> { 'startat': self._startat } (mutex job)
             $fqdn:$op:$uuid:meta -> { 'startat': self._startat }
@@ -310,28 +950,104 @@ class Job(object):
                 'startat': self._startat
                 'associate' -> $taskid
             }
+
+        And add the taskid into the job index and the job indexes of its
+        operation, state and each of its targets (see ``Job.index``):
+            jobs:index -> { $taskid: $startat, ... }
+            jobs:operate:$operate -> { $taskid: $startat, ... }
+            jobs:state:$state -> { $taskid: $startat, ... }
+            jobs:host:$fqdn -> { $taskid: $startat, ... }
         """
-        pipeline = redis.pipeline(False)
-        pipeline.hmset(
-            self._key(task.id),
-            dict(
-                state        = Job.STATE_RUNNING,
-                targets      = json.dumps(self._targets),
-                operate      = self._op,
-                operate_args = json.dumps(self._opargs),
-                utag         = self._utag,
-                startat      = self._startat,
-                error        = ""))
+        return self._associate(task.id, redis)
+
+    def fanout(self, shards, redis):
+        """ Associate job context with ``shards`` sub-tasks, return the jid.
+
+        Unlike ``Job.associate_task``, the jid was generated here before
+        any sub-task dispatched, each sub-task should be dispatched with
+        ``Job.shard_ctx`` of its own targets, which runs by any celery
+        worker and writes return data into this job.
+
+        Each sub-task marks itself done via ``Job.done``, the last one of
+        them marks the job as done with combined results of all sub-tasks,
+        see ``Job._shard_done``.
+        """
+        self._shards = shards
+        return self._associate(str(uuid.uuid4()), redis)
+
+    def shard_ctx(self, shard, targets):
+        """ Dump context of sub-task ``shard`` on ``targets`` of fan-out job. """
+        ctx = self.dict_ctx
+        ctx.update(targets=targets, shard=shard)
+        return ctx
+
+    def shard_aborted(self, shard, targets, errmsg, redis):
+        """ Mark sub-task ``shard`` of fan-out job, never dispatched, failed.
+
+        Each of its targets is marked as failed and the sub-task is marked
+        done (see ``Job._shard_done``), so the ``shards_pending`` counter
+        still reaches zero once the dispatched sub-tasks are done.
+        """
+        sub = Job.load(self.shard_ctx(shard, targets))
+        for target in targets:
+            sub.target_done(target, True, redis)
+        sub.done(True, errmsg, redis)
 
+    def _associate(self, taskid, redis):
+        """ Create the job key and indexes of job with given taskid. """
+        self._id = taskid
+
+        ctx = dict(state        = Job.STATE_RUNNING,
+                   targets      = json.dumps(self._targets),
+                   operate      = self._op,
+                   operate_args = json.dumps(self._opargs),
+                   utag         = self._utag,
+                   startat      = self._startat,
+                   error        = "",
+                   hosts_total  = len(self._targets),
+                   hosts_done   = 0,
+                   hosts_failed = 0)
+        if self._shards:
+            ctx.update(shards=self._shards, shards_pending=self._shards)
+
+        pipeline = redis.pipeline(False)
+        pipeline.hmset(self._key(taskid), ctx)
         for key in self.meta_keys:
-            pipeline.hset(key, 'associate', task.id)
+            pipeline.hset(key, 'associate', taskid)
+        pipeline.zadd(self._index_key(), {taskid: self._startat})
+        pipeline.zadd(self._operate_key(self.operate),
+                      {taskid: self._startat})
+        pipeline.zadd(self._state_key(Job.STATE_RUNNING),
+                      {taskid: self._startat})
+        for target in self._targets:
+            pipeline.zadd(self._host_key(target), {taskid: self._startat})
         pipeline.execute()
 
-        return task.id
+        return taskid
 
     def bind(self, taskid):
-        """ Bind job context with celery task by taskid. """
-        self._id = taskid
+        """ Bind job context with celery task by taskid.
+
+        Sub-tasks of fan-out job (see ``Job.fanout``) keep the jid.
+        """
+        if self._shard == None:
+            self._id = taskid
+
+    def open_writer(self, redis, max_events=WRITER_MAX_EVENTS,
+                    interval=WRITER_INTERVAL, maxlen=STREAM_MAXLEN, codec=None,
+                    spill=None):
+        """ Buffer return data pushed by ``push_return_data`` via ``JobWriter``.
+
+        Return data will be encoded via ``codec`` (a ``PayloadCodec``) if
+        given, and oversized ones will be capped via ``spill`` (a
+        ``SpillStore``) if given. The writer will be flushed and closed by
+        ``Job.done``.
+        """
+        if codec != None:
+            self._codec = codec
+        if spill != None:
+            self._spill = spill
+        self._writer = JobWriter(self, redis, max_events, interval, maxlen)
 
     def push_return_data(self, target, data, redis):
         """ Push return data into job data key with target and retval.
@@ -339,15 +1055,83 @@ class Job(object):
         Each of these data key will be create right after the first
         ``redis.rpush()`` call inside this method.
 
-        This method also publish these data into a redis pubsub system
-        for support job query in follow mode.
+        This method also append these data into the job stream (a capped
+        redis stream) for support job query in follow mode, each of these
+        stream entries is a redis hash:
+            job:$taskid:events -> {
+                'target' -> $fqdn
+                'data'   -> $return_data
+            }
+
+        If there is an opened writer (see ``Job.open_writer``), the data
+        will be buffered and written in batch by that writer.
+
+        Except announces, each return data also increase the per-status
+        counter of job hash (``count:$state``) and the per-host counter
+        (``$fqdn:$state`` of ``job:$taskid:hosts``) inside the same
+        pipeline, see ``Job.load_progress``.
+        """
+        state = data.get(EXE_STATUS_ATTR)
+        if execstate_announce(state):
+            state = None
+
+        content = self._codec.encode(data)
+        if self._spill != None:
+            capped = self._spill.cap(self.operate, data, len(content))
+            if capped is not data:
+                content = self._codec.encode(capped)
+        if self._writer:
+            self._writer.push(target, content, state)
+        else:
+            self._write_return_data([(target, content, state)], redis)
+
+    def _write_return_data(self, events, redis, maxlen=STREAM_MAXLEN):
+        """ Write a batch of ``(target, content, state)`` via one pipeline.
+
+        Event with ``None`` content means operate on target was done, see
+        ``Job.target_done``, the ``state`` is the final state of target.
+
+        The pipeline is a transaction (``MULTI/EXEC``), the batch is applied
+        all or nothing, a retried batch never duplicates events or counters.
         """
-        content = json.dumps(data)
-        redis.publish("{0}:{1}".format(target, self._op), content)
-        redis.rpush(self._data_key(target), content)
+        contents = collections.OrderedDict()
+        counters = collections.Counter()
+        host_counters = collections.Counter()
+        host_states = {}
+
+        pipeline = redis.pipeline()
+        for target, content, state in events:
+            if content == None:
+                host_states[target] = state
+                counters['hosts_done'] += 1
+                if state == Job.STATE_FAILURE:
+                    counters['hosts_failed'] += 1
+                continue
+            pipeline.xadd(self._stream_key(self._id),
+                          dict(target=target, data=content),
+                          maxlen=maxlen, approximate=True)
+            contents.setdefault(target, []).append(content)
+            if state != None:
+                counters[self._counter_field(state)] += 1
+                host_counters["{0}:{1}".format(target, state)] += 1
+
+        for target, _contents in contents.items():
+            pipeline.rpush(self._data_key(target), *_contents)
+        for field, val in counters.items():
+            pipeline.hincrby(self._key(self._id), field, val)
+        for field, val in host_counters.items():
+            pipeline.hincrby(self._hosts_key(self._id), field, val)
+        if host_states:
+            pipeline.hmset(self._hosts_key(self._id), host_states)
+        pipeline.execute()
 
     def target_done(self, target, failed, redis):
-        """ Logging and update Job Context when operate on target was done. """
+        """ Logging and update Job Context when operate on target was done.
+
+        The state of target is recorded inside ``job:$taskid:hosts`` and
+        the ``hosts_done``/``hosts_failed`` counters are increased, both
+        written along with return data if there is an opened writer.
+        """
         if failed:
             state = "failed"
             if not self._error:
@@ -357,13 +1141,61 @@ class Job(object):
         LOG.info("{0} operation on {1} of {2} was "
                  "{3}".format(self.operate, target, self._id, state))
 
-    def done(self, failed, errmsg, redis):
-        """ Mark job as done or failed. """
+        event = (target, None,
+                 Job.STATE_FAILURE if failed else Job.STATE_DONE)
+        if self._writer:
+            self._writer.push(*event)
+        else:
+            self._write_return_data([event], redis)
+
+    def load_job_progress(self, redis):
+        """ Load job-wide progress counters, see ``Job.load_progress``.
+
+        Events buffered inside the writer are flushed first, counters of
+        fan-out job are shared by all of its sub-tasks.
+        """
+        if self._writer:
+            self._writer.flush()
+        return self.load_progress(self._id, redis)['progress']
+
+    def done(self, failed, errmsg, redis, stats=None):
+        """ Mark job as done or failed.
+
+        The ``stats`` is the final statistics of each host reported by the
+        executor (see ``ExecutorPrototype.stats``), stored if given.
+
+        For sub-task of fan-out job, only the last finished one marks the
+        job, see ``Job._shard_done``.
+
+        If buffered return data still can not be written by the writer,
+        the job is marked as failed with the error of lost return data,
+        which also releases the meta keys of targets.
+        """
+        if self._writer:
+            try:
+                self._writer.close()
+            except:
+                lost = "<{0}> return data lost, {1}".format(
+                    self._writer.pending, excinst())
+                LOG.error("job <{0}> writer close failed, {1}".format(
+                    self._id, lost))
+                failed = True
+                errmsg = "; ".join([ e for e in (errmsg or self._error, lost)
+                                     if e ])
+            self._writer = None
+
+        if self._shard != None:
+            results = self._shard_done(failed, errmsg or self._error,
+                                       redis, stats)
+            if results == None:
+                return
+            failed, errmsg, stats = results
+
         if failed:
-            redis.publish("{0}:control".format(self._op), Job.FAILURE)
+            control = Job.FAILURE
             state = Job.STATE_FAILURE
         else:
-            redis.publish("{0}:control".format(self._op), Job.DONE)
+            control = Job.DONE
             state = Job.STATE_DONE
 
         if not errmsg:
@@ -372,32 +1204,287 @@ class Job(object):
         pipeline = redis.pipeline(False)
         pipeline.hset(self._key(self._id), 'error', errmsg)
         pipeline.hset(self._key(self._id), 'state', state)
+        pipeline.zrem(self._state_key(Job.STATE_RUNNING), self._id)
+        pipeline.zadd(self._state_key(state), {self._id: self._startat})
+        if stats != None:
+            pipeline.hset(self._key(self._id), 'stats', json.dumps(stats))
+        pipeline.xadd(self._stream_key(self._id), dict(control=control))
+        pipeline.zadd(self._compact_key(), {self._id: int(time.time())})
         pipeline.delete(*self.meta_keys)
         pipeline.execute()
 
+    def _shard_done(self, failed, errmsg, redis, stats):
+        """ Record result of sub-task, combine results after all done.
+
+        The result is recorded inside ``job:$taskid:shards`` and the
+        ``shards_pending`` counter of job hash is decreased by one within
+        one transaction, the sub-task which sees no pending sub-tasks is
+        the last one, which combines results of all sub-tasks:
+
+            failed -> ``True`` if any sub-task failed
+            errmsg -> error messages of failed sub-tasks
+            stats  -> statistics of hosts of all sub-tasks
+
+        Return ``None`` if there are pending sub-tasks, meta keys of
+        targets of this sub-task are deleted anyway.
+        """
+        pipeline = redis.pipeline(True)
+        pipeline.hset(self._shards_key(self._id), self._shard, json.dumps(
+            dict(failed=bool(failed), error=errmsg, stats=stats)))
+        pipeline.hincrby(self._key(self._id), 'shards_pending', -1)
+        pipeline.delete(*self.meta_keys)
+        _, pending, _ = pipeline.execute()
+
+        LOG.info("shard <{0}> of job <{1}> done, <{2}> shards "
+                 "pending".format(self._shard, self._id, pending))
+        if pending > 0:
+            return None
+
+        results = redis.hgetall(self._shards_key(self._id))
+        redis.unlink(self._shards_key(self._id))
+
+        failed, errors, stats = False, [], None
+        for shard in sorted(results, key=int):
+            result = json.loads(results[shard])
+            if result['failed']:
+                failed = True
+                if result['error']:
+                    errors.append("shard <{0}>: {1}".format(
+                        shard, result['error']))
+            if result['stats'] != None:
+                stats = stats or {}
+                stats.update(result['stats'])
+        return failed, "; ".join(errors), stats
+
+    def compact(self, redis, expireat):
+        """ Compact return data of finished job and schedule its expiration.
+
+        All return data (the data keys) of each target will be compressed
+        into one field of the job blob, keyed by the target, so that loading
+        one target decodes only its own return data, and the data keys and
+        the job stream are unlinked, after
+        that, the job will be deleted by the sweeper at ``expireat``, the
+        job context and the job blob will expire by themselves a while
+        later if the sweeper was not running.
+        """
+        self.load_data(redis)
+        blobs = dict([ (target, BLOB_CODEC.encode(rdata))
+                       for target, rdata in self._rdata.items() if rdata ])
+
+        pipeline = redis.pipeline(False)
+        if blobs:
+            pipeline.hmset(self._blob_key(self._id), blobs)
+        pipeline.hset(self._key(self._id), 'compacted', 1)
+        pipeline.unlink(self._stream_key(self._id), *self.data_keys)
+        pipeline.expireat(self._blob_key(self._id), expireat + EXPIRE_GRACE)
+        pipeline.expireat(self._key(self._id), expireat + EXPIRE_GRACE)
+        pipeline.expireat(self._hosts_key(self._id), expireat + EXPIRE_GRACE)
+        pipeline.hmset(self._indexes_key(self._id),
+                       dict(operate=self.operate,
+                            targets=json.dumps(self._targets)))
+        pipeline.zadd(self._expire_key(), {self._id: expireat})
+        pipeline.execute()
+        self._compacted = True
+
     def sweep(self, redis):
-        """ Delete job and corresponding context (meta/data keys) from redis. """
+        """ Delete job and corresponding context (meta/data keys) from redis.
+
+        Keys are deleted via ``UNLINK``, which reclaims memory in background
+        and never blocks redis no matter how large they are.
+        """
         pipeline = redis.pipeline(False)
-        pipeline.delete(*self.data_keys)
-        pipeline.delete(self._key(self._id))
+        pipeline.unlink(*self.data_keys)
+        pipeline.unlink(self._key(self._id))
+        pipeline.unlink(self._blob_key(self._id))
+        pipeline.unlink(self._hosts_key(self._id))
+        pipeline.unlink(self._shards_key(self._id))
+        pipeline.unlink(self._stream_key(self._id))
+        self._unindex(pipeline, self._id, self.operate, self._targets)
         pipeline.execute()
 
-    def follow(self, redis):
-        """ Yield job context for follow mode. """
-        cc = "{0}:control".format(self._op)
-        rc = [ "{0}:{1}".format(target, self._op) for target in self._targets ]
-        ps = redis.pubsub(ignore_subscribe_messages=True)
+    @classmethod
+    def sweep_expired(cls, taskid, redis):
+        """ Remove job whose context already expired from all indexes.
 
-        ps.subscribe(cc, *rc)
+        The operate and targets are read from the index entries written
+        by ``Job.compact``, without them only ``jobs:index`` is cleaned.
+        """
+        entries = redis.hgetall(cls._indexes_key(taskid))
+        operate = entries.get('operate')
+        try:
+            targets = json.loads(entries.get('targets') or "[]")
+        except ValueError:
+            targets = []
+
+        pipeline = redis.pipeline(False)
+        pipeline.unlink(cls._blob_key(taskid), cls._hosts_key(taskid),
+                        cls._shards_key(taskid), cls._stream_key(taskid))
+        cls._unindex(pipeline, taskid, operate, targets)
+        pipeline.execute()
+
+    @classmethod
+    def _unindex(cls, pipeline, taskid, operate, targets):
+        """ Queue commands remove job from all indexes into ``pipeline``. """
+        pipeline.unlink(cls._indexes_key(taskid))
+        pipeline.zrem(cls._index_key(), taskid)
+        pipeline.zrem(cls._compact_key(), taskid)
+        pipeline.zrem(cls._expire_key(), taskid)
+        if operate:
+            pipeline.zrem(cls._operate_key(operate), taskid)
+        for state in cls.STATES:
+            pipeline.zrem(cls._state_key(state), taskid)
+        for target in targets:
+            pipeline.zrem(cls._host_key(target), taskid)
+
+    def last_event(self, redis):
+        """ Return the id of the last event inside the job stream. """
+        events = redis.xrevrange(self._stream_key(self._id), count=1)
+        return events[0][0] if events else STREAM_BEGIN
+
+    def follow(self, redis, dispatcher, start, replay=False):
+        """ Yield job context and job events for follow mode.
+
+        Job events are read from the job stream right after the event id
+        ``start`` by the ``FollowDispatcher`` of current process, each
+        yielded event is a dict contains return data of one target and the
+        event id (the ``Job.EVENT_ID`` attr), client can resume follow from
+        that id without missing or re-fetching events.
+
+        If this follow client was too slow and dropped by the dispatcher,
+        the last event is a dict contains the ``Job.LAGGED`` attr, which
+        is the id of the last event yielded.
+
+        Unless ``replay`` is ``True``, return right after yield the job
+        context if the job is not running.
+        """
         yield self.ctx
-        if self.ctx['state'] != Job.STATE_RUNNING:
+        if not replay and self._state != Job.STATE_RUNNING:
             return
 
-        for msg in ps.listen():
-            data = msg['data']
-            source = msg['channel']
+        sub = dispatcher.subscribe(self._stream_key(self._id), start)
+        try:
+            drain = False
+            while True:
+                event = sub.get(FOLLOW_BLOCK)
+                if event == None:
+                    if sub.lagged:
+                        yield {Job.LAGGED: sub.offset}
+                        return
+                    if drain:   # job finished and no more events
+                        return
+                    # no control event will come if the job stream was
+                    #   trimmed or the job was interrupted, check job state
+                    #   instead and wait for the trailing events once more
+                    if redis.hget(self._key(self._id), 'state') != str(
+                            Job.STATE_RUNNING):
+                        drain = True
+                    continue
 
-            if source == cc:
-                break
-            source = source.split(':')[0]   ## remove the operate 
-            yield {source: json.loads(data)}
+                eid, event = event
+                if 'control' in event:
+                    return
+                yield {event['target']: decode(event['data']),
+                       Job.EVENT_ID: eid}
+        finally:
+            dispatcher.unsubscribe(sub)
+
+
+class JobWriter(object):
+    """ Write-behind buffer for return data of job.
+
+    Each runner event used to cost two round trips (``XADD`` and
+    ``RPUSH``) before the runner could handle the next one, the writer
+    buffers these events and writes them via one redis pipeline when
+    there are ``max_events`` events buffered or the first buffered event
+    has been waiting for ``interval`` milliseconds, whichever comes first.
+
+    The ``interval`` flush is done by a timer thread, which keeps the
+    latency of job query in follow mode bounded even if the runner was
+    blocked by a long run task.
+    """
+
+    def __init__(self, job, redis, max_events=WRITER_MAX_EVENTS,
+                 interval=WRITER_INTERVAL, maxlen=STREAM_MAXLEN):
+        """ Initialize JobWriter instance. """
+        self._job = job
+        self._redis = redis
+        self._maxlen = maxlen
+        self._max_events = max(max_events, 1)
+        self._interval = max(interval, 0) / 1000.0
+
+        self._lock = threading.Lock()
+        self._timer = None
+        self._events = []
+
+    def push(self, target, content, state=None):
+        """ Buffer return data, flush the buffer if it was full.
+
+        A failed flush keeps the events buffered and retried by the timer
+        (or the next flush), the error is raised by ``close``.
+        """
+        with self._lock:
+            self._events.append((target, content, state))
+            full = len(self._events) >= self._max_events
+            if not full:
+                self._schedule()
+        if full:
+            try:
+                self.flush()
+            except:
+                LOG.error("job writer flush failed, events kept for retry, "
+                          "{0}".format(excinst()))
+                with self._lock:
+                    self._schedule(max(self._interval, WRITER_RETRY))
+
+    def flush(self):
+        """ Write all buffered return data to redis.
+
+        If the write failed, events are put back to the front of buffer
+        and the error is raised, the batch is written as one transaction,
+        which never partially applied before retry.
+        """
+        with self._lock:
+            if self._timer != None:
+                self._timer.cancel()
+                self._timer = None
+            events, self._events = self._events, []
+            if not events:
+                return
+            try:
+                self._job._write_return_data(events, self._redis,
+                                             self._maxlen)
+            except:
+                self._events[:0] = events
+                raise
+
+    @property
+    def pending(self):
+        """ Count of events buffered and not written yet. """
+        with self._lock:
+            return len(self._events)
+
+    def close(self):
+        """ Flush the buffer, called before job marked as done.
+
+        Raise the error if buffered events still can not be written, the
+        job is marked as failed by ``Job.done`` in that case.
+        """
+        self.flush()
+
+    def _schedule(self, delay=None):
+        """ Start the flush timer if not started, called with lock held. """
+        if self._timer == None:
+            self._timer = threading.Timer(
+                self._interval if delay == None else delay, self._tick)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _tick(self):
+        """ Timer callback, flush the buffer inside the timer thread. """
+        try:
+            self.flush()
+        except:
+            LOG.error("job writer flush failed, events kept for retry, "
+                      "{0}".format(excinst()))
+            with self._lock:
+                self._schedule(max(self._interval, WRITER_RETRY))
@@ -9,6 +9,7 @@ from .context import Context
 from exe.executor.utils import *
 from exe.utils.err import excinst
 from exe.exc import ExecutorPrepareError, ExecutorNoMatchError
+from exe.exc import ExecutorTimeoutError
 
 
 LOG = logging.getLogger(__name__)
@@ -20,15 +21,18 @@ class PingRunner(Context):
     __RUNNER_NAME__ = "ping"
     __RUNNER_MUTEX_REQUIRED__ = False
 
-    def handle(ctx, targets, run_async=False):
-        """ Handle remote ping request. """
+    def handle(ctx, targets, run_async=False, timeout=None):
+        """ Handle remote ping request.
+
+        Under block mode, return results collected within ``timeout``
+        seconds, see ``Context.executor``.
+        """
         if not run_async:
-            return next(ctx.executor(targets).ping(), None)
+            return collect_exec_yielddata(ctx.executor(targets, timeout).ping())
         job = Job(targets, ctx.runner_name, ctx.runner_mutex)
         job.create(ctx.redis)
         
-        return job.associate_task(
-            _async_ping.delay(job.dict_ctx, targets), ctx.redis)
+        return ctx.dispatch(job, _async_ping, targets)
 
 
 @AsyncRunner.task(bind=True, ignore_result=True,
@@ -39,9 +43,11 @@ def _async_ping(ctx, job_ctx, targets):
 
     try:
         redis = _async_ping.redis
+        job.open_writer(redis, **_async_ping.writer_opts)
+        executor = _async_ping.executor(targets)
 
         failed_targets = []
-        for yield_data in _async_ping.executor(targets).ping():
+        for yield_data in executor.ping():
             target, context = decompose_exec_yielddata(yield_data)
 
             # ping returns:
@@ -59,9 +65,9 @@ def _async_ping(ctx, job_ctx, targets):
         if failed_targets:
             msg = "total <{0}> of <{1}> remote host(s) no response".format(
                 len(failed_targets), len(targets))
-        job.done(bool(failed_targets), msg, redis)
+        job.done(bool(failed_targets), msg, redis, executor.stats)
 
-    except (ExecutorPrepareError, ExecutorNoMatchError):
+    except (ExecutorPrepareError, ExecutorNoMatchError, ExecutorTimeoutError):
         msg = "got executor error, {0}".format(excinst())
         LOG.error(msg)
         job.done(failed=True, errmsg=msg, redis=redis)
@@ -9,6 +9,7 @@ from .context import Context
 from exe.executor.utils import *
 from exe.utils.err import excinst
 from exe.exc import ExecutorPrepareError, ExecutorNoMatchError
+from exe.exc import ExecutorTimeoutError
 
 
 LOG = logging.getLogger(__name__)
@@ -20,20 +21,24 @@ class ServiceRunner(Context):
     __RUNNER_NAME__ = "service"
     __RUNNER_MUTEX_REQUIRED__ = False
 
-    def handle(ctx, targets, name, start, restart, graceful, run_async=False):
-        """ Handle remote service maintain request. """
+    def handle(ctx, targets, name, start, restart, graceful,
+               run_async=False, timeout=None):
+        """ Handle remote service maintain request.
+
+        Under block mode, return results collected within ``timeout``
+        seconds, see ``Context.executor``.
+        """
         if not run_async:
-            return next(
-                ctx.executor(targets).service(name, start, restart, graceful),
-                None)
+            return collect_exec_yielddata(
+                ctx.executor(targets, timeout).service(
+                    name, start, restart, graceful))
         job = Job(targets, ctx.runner_name, ctx.runner_mutex, 
                   dict(name=name, start=start,
                        restart=restart, graceful=graceful))
         job.create(ctx.redis)
 
-        return job.associate_task(
-            _async_service.delay(job.dict_ctx, targets,
-                                 name, start, restart, graceful), ctx.redis)
+        return ctx.dispatch(job, _async_service, targets,
+                            name, start, restart, graceful)
 
 
 @AsyncRunner.task(bind=True, ignore_result=True,
@@ -44,6 +49,7 @@ def _async_service(ctx, job_ctx, targets, name, start, restart, graceful):
 
     try:
         redis = _async_service.redis
+        job.open_writer(redis, **_async_service.writer_opts)
         executor = _async_service.executor(targets)
 
         failed_targets = []
@@ -65,9 +71,9 @@ def _async_service(ctx, job_ctx, targets, name, start, restart, graceful):
         if failed_targets:
             msg = "<{0}> of <{1}> remote host(s) got service errors".format(
                 len(failed_targets), len(targets))
-        job.done(bool(failed_targets), msg, redis)
+        job.done(bool(failed_targets), msg, redis, executor.stats)
 
-    except (ExecutorPrepareError, ExecutorNoMatchError):
+    except (ExecutorPrepareError, ExecutorNoMatchError, ExecutorTimeoutError):
         msg = ("got executor error while invoke service tool, "
                "{0}").format(excinst())
         LOG.error(msg)
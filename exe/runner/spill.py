@@ -0,0 +1,100 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import time
+import logging
+
+from ._async import AsyncRunner
+from .context import Context
+
+from exe.utils.err import excinst
+from exe.utils.spill import SPILL_ATTR
+
+
+LOG = logging.getLogger(__name__)
+
+
+## Consts ##
+SPILL_LOAD_TIMEOUT = 2      # max seconds waiting for spilled return data
+SPILL_ERROR_ATTR = "error"  # attr of spill reference, why it was not loaded
+
+
+@AsyncRunner.task(bind=True, base=Context, serializer='json')
+def _async_spill_load(ctx, digest, deadline=None):
+    """ Load spilled return data from the spill dir of this node.
+
+    Sent to the spill queue of the node which spilled it (see
+    ``SpillStore``), which is served by every celery worker of that node.
+
+    Return ``None`` instead once ``deadline`` passed, nobody waits for the
+    result any more, which keeps the late payload out of the result
+    backend.
+    """
+    if deadline != None and time.time() >= deadline:
+        return None
+    full = ctx.spill.load(digest)
+    if deadline != None and time.time() >= deadline:
+        return None
+    return full
+
+
+def load_spilled(ctx, rdata, timeout=SPILL_LOAD_TIMEOUT):
+    """ Replace capped items of return data list ``rdata`` with full ones.
+
+    The spill dir of current process is tried first (e.g.: runs on the
+    same node or the spill dir is shared), otherwise the full one is
+    loaded by worker of the node spilled it, all of them are requested
+    at once and waited at most ``timeout`` seconds in total, which keeps
+    the api thread from blocked by a busy or gone node. These loads expire
+    with the wait and their results are forgotten on every path, the
+    payload is kept inside the result backend no longer than needed.
+
+    Items whose full one can not be loaded are kept as they are, with the
+    reason inside the ``SPILL_ERROR_ATTR`` attr of their spill reference.
+    """
+    deadline = time.time() + timeout
+    pending = []
+    for idx, retval in enumerate(rdata):
+        ref = retval.get(SPILL_ATTR) if isinstance(retval, dict) else None
+        if not ref or not ref.get('digest'):
+            continue
+
+        full = ctx.spill.load(ref['digest'])
+        if full != None:
+            rdata[idx] = full
+            continue
+        try:
+            pending.append((idx, ref, _async_spill_load.apply_async(
+                (ref['digest'], deadline), queue=ref['queue'],
+                expires=timeout)))
+        except:
+            _load_failed(ref, excinst())
+
+    for idx, ref, result in pending:
+        try:
+            full = result.get(timeout=max(deadline - time.time(), 0.01))
+        except:
+            _load_failed(ref, excinst())
+            continue
+        finally:
+            _forget(result)
+
+        if full == None:
+            _load_failed(ref, "spilled return data was gone or not loaded in time")
+            continue
+        rdata[idx] = full
+
+
+def _forget(result):
+    """ Remove ``result`` from the result backend, never raise. """
+    try:
+        result.forget()
+    except:
+        LOG.warning("forget result of spill load <{0}> failed, "
+                    "{1}".format(result.id, excinst()))
+
+
+def _load_failed(ref, error):
+    """ Keep the capped item, mark its spill reference with ``error``. """
+    LOG.warning("load spilled return data <{0}> from <{1}> failed, "
+                "{2}".format(ref['digest'], ref.get('queue'), error))
+    ref[SPILL_ERROR_ATTR] = str(error)
@@ -0,0 +1,92 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import time
+import logging
+
+from .jobs import Job
+from ._async import AsyncRunner
+from .context import Context
+
+from exe.utils.err import excinst
+
+
+LOG = logging.getLogger(__name__)
+
+
+## Consts ##
+SWEEP_BATCH = 100   # max jobs compacted or expired by each batch
+
+
+def _claim(redis, key, now):
+    """ Yield jids inside the queue ``key`` whose score was reached.
+
+    Each jid is removed from the queue before yield, if there are more
+    than one sweeper running, only one of them can claim that jid.
+    """
+    while True:
+        jids = redis.zrangebyscore(key, "-inf", now, start=0, num=SWEEP_BATCH)
+        if not jids:
+            return
+        for jid in jids:
+            if redis.zrem(key, jid):
+                yield jid
+
+
+@AsyncRunner.task(bind=True, ignore_result=True,
+                  base=Context, serializer='json')
+def _async_sweep(ctx):
+    """ Compact finished jobs and delete expired jobs.
+
+    The first run also indexes jobs created before the job indexes
+    existed, see ``Job.backfill``.
+
+    Scheduled via celery beat every ``sweep_interval`` seconds, which
+    means there should be a celery beat running (e.g.: ``celery worker``
+    with ``--beat`` option) for this task.
+    """
+    redis = _async_sweep.redis
+    now = int(time.time())
+
+    # jobs created before the job indexes existed, runs once
+    try:
+        indexed = Job.backfill(redis)
+        if indexed != None:
+            LOG.info("<{0}> job(s) created before job indexes "
+                     "indexed".format(indexed))
+    except:
+        LOG.error("got unexpected error while index jobs created "
+                  "before job indexes, {0}".format(excinst()))
+
+    compacted = 0
+    try:
+        for jid in _claim(redis, Job._compact_key(),
+                          now - _async_sweep.cfg.compact_delay):
+            job = Job.load_task(jid, redis)
+            if not job:
+                continue
+            try:
+                job.compact(redis,
+                            now + _async_sweep.retention(job.operate))
+                compacted += 1
+            except:
+                redis.zadd(Job._compact_key(), {jid: now})  # retry later
+                raise
+    except:
+        LOG.error("got unexpected error while compact "
+                  "finished jobs, {0}".format(excinst()))
+
+    expired = 0
+    try:
+        for jid in _claim(redis, Job._expire_key(), now):
+            job = Job.load_task(jid, redis)
+            if not job:     # the job context already expired
+                Job.sweep_expired(jid, redis)
+                continue
+            job.sweep(redis)
+            expired += 1
+    except:
+        LOG.error("got unexpected error while sweep "
+                  "expired jobs, {0}".format(excinst()))
+
+    LOG.info("sweeper done, <{0}> job(s) compacted, <{1}> job(s) "
+             "expired".format(compacted, expired))
@@ -12,9 +12,16 @@ class TargetRunner(Context):
     __RUNNER_NAME__ = "target"
     __RUNNER_MUTEX_REQUIRED__ = False
 
-    def handle(ctx, pattern, run_async=False):
+    def handle(ctx, pattern, run_async=False, offset=0, limit=0):
+        """ Handle target match request.
+
+        Return a pair which contains count of all matched targets and at
+        most ``limit`` (0 for no limit) of them right after ``offset``.
+        """
         if not run_async:
-            return ctx.executor().target(pattern)
+            targets = ctx.executor().target(pattern)
+            return len(targets), targets[offset:(
+                offset + limit) if limit else None]
         # This should never happen
         raise JobNotSupportedError("{0} can not run under "
                                    "async mode.".format(self.runner_name))
@@ -13,6 +13,7 @@ from exe.exc import JobNotSupportedError
 from exe.exc import ExecutorPrepareError
 from exe.exc import ExecutorDeployError
 from exe.exc import ExecutorNoMatchError
+from exe.exc import ExecutorTimeoutError
 from exe.exc import TaskNotSupportedError, TaskPrepareError
 from exe.exc import TaskError, TaskAbort
 
@@ -54,6 +55,7 @@ def _async_task(ctx, job_ctx, targets, taskname, tasktype, taskopts):
 
     try:
         redis = _async_task.redis
+        job.open_writer(redis, **_async_task.writer_opts)
         executor = _async_task.executor(targets)
 
         try:
@@ -78,7 +80,7 @@ def _async_task(ctx, job_ctx, targets, taskname, tasktype, taskopts):
         except TypeError:
             raise TaskPrepareError("{0} bad task plugin args".format(excinst()))
 
-        failed_targets = []
+        failed_targets = set()
         for yield_data in returner:
             target, context = decompose_exec_yielddata(yield_data)
 
@@ -97,7 +99,7 @@ def _async_task(ctx, job_ctx, targets, taskname, tasktype, taskopts):
 
             # handle success & failure context
             if execstate_failure(state):
-                failed_targets.append(target)
+                failed_targets.add(target)
 
                 _context = compose_exec_returncontext(
                     state, name, executor.extract_return_error(return_ctx))
@@ -106,17 +108,17 @@ def _async_task(ctx, job_ctx, targets, taskname, tasktype, taskopts):
                                                       execstate_name(state))
             job.push_return_data(target, _context, redis)
 
+        for target in targets:
+            job.target_done(target, target in failed_targets, redis)
+
         msg = None
         if failed_targets:
-            for target in targets:
-                failed = target in failed_targets
-                job.target_done(target, failed, redis)
-
             msg = "<{0}> of <{1}> remote host(s) got task errors".format(
                 len(failed_targets), len(targets))
-        job.done(bool(failed_targets), msg, redis)
+        job.done(bool(failed_targets), msg, redis, executor.stats)
 
-    except (ExecutorPrepareError, ExecutorDeployError, ExecutorNoMatchError):
+    except (ExecutorPrepareError, ExecutorDeployError,
+            ExecutorNoMatchError, ExecutorTimeoutError):
         msg = "got executor error while execute task, {0}".format(excinst())
         LOG.error(msg)
         job.done(failed=True, errmsg=msg, redis=redis)
@@ -8,6 +8,7 @@ from celery import bootsteps
 from exe.exc import ConfigError
 from exe.utils.cfg import cfgread
 from exe.utils.err import excinst 
+from exe.utils.spill import spill_queue
 
 from .context import Context
 
@@ -24,6 +25,20 @@ def celery_initialize(c):
         result_backend=cfg.redis_url
     )
 
+    beat_schedule = {}
+    if cfg.sweep_interval > 0:
+        beat_schedule['exe-sweep'] = {
+            'task': "exe.runner.sweeper._async_sweep",
+            'schedule': cfg.sweep_interval,
+        }
+    if cfg.facts_refresh_interval > 0:
+        beat_schedule['exe-facts-refresh'] = {
+            'task': "exe.runner.facter._async_facts_refresh",
+            'schedule': cfg.facts_refresh_interval,
+        }
+    if beat_schedule:
+        c.conf.beat_schedule = beat_schedule
+
 
 def celery_worker_arguments(parser):
     """ Handle exe arguments when celery worker start. """
@@ -49,6 +64,9 @@ class CeleryWorkerInit(bootsteps.Step):
                     "conf before start celery worker")
             cfgread(exe_conf)
             celery_initialize(worker.app)
+
+            # serve loads of return data spilled by workers of this node
+            worker.app.amqp.queues.select_add(spill_queue())
         except ConfigError:
             LOG.error(
                 "can not initialize celery instance, got error while "
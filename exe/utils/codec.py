@@ -0,0 +1,151 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import zlib
+import json
+import base64
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from exe.exc import ConfigError
+
+
+__all__ = ["PayloadCodec", "decode"]
+
+
+## Consts ##
+CODEC_VERSION = '\x01'      # never be the first char of a json document
+
+SERIALIZER_JSON    = 'j'
+SERIALIZER_MSGPACK = 'm'
+SERIALIZERS = dict(json=SERIALIZER_JSON, msgpack=SERIALIZER_MSGPACK)
+
+COMPRESS_NONE = '-'
+COMPRESS_ZLIB = 'z'
+COMPRESS_ZSTD = 's'
+COMPRESSORS = dict(none=COMPRESS_NONE, zlib=COMPRESS_ZLIB, zstd=COMPRESS_ZSTD)
+COMPRESS_AUTO = "auto"
+COMPRESS_THRESHOLD = 4096   # bytes, compress payload larger than this
+
+
+def _serialize(serializer, data):
+    """ Serialize ``data`` into bytes. """
+    if serializer == SERIALIZER_MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data).encode('utf-8')
+
+
+def _deserialize(serializer, payload):
+    """ Deserialize bytes ``payload`` into python object. """
+    if serializer == SERIALIZER_MSGPACK:
+        _require(msgpack, "msgpack")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload.decode('utf-8'))
+
+
+def _compress(compressor, payload):
+    """ Compress bytes ``payload``. """
+    if compressor == COMPRESS_ZSTD:
+        return zstandard.ZstdCompressor().compress(payload)
+    if compressor == COMPRESS_ZLIB:
+        return zlib.compress(payload)
+    return payload
+
+
+def _decompress(compressor, payload):
+    """ Decompress bytes ``payload``. """
+    if compressor == COMPRESS_ZSTD:
+        _require(zstandard, "zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if compressor == COMPRESS_ZLIB:
+        return zlib.decompress(payload)
+    return payload
+
+
+def _require(module, name):
+    """ Raise ``ConfigError`` if optional dependency not installed. """
+    if module == None:
+        raise ConfigError("python package \"{0}\" is required by "
+                          "payload codec".format(name))
+
+
+def decode(record):
+    """ Decode a record encoded by ``PayloadCodec``.
+
+    Records without the version char are plain json documents written
+    before the codec was introduced.
+    """
+    if not record.startswith(CODEC_VERSION):
+        return json.loads(record)
+
+    serializer, compressor, body = record[1], record[2], record[3:]
+    if serializer == SERIALIZER_JSON and compressor == COMPRESS_NONE:
+        return json.loads(body)
+    return _deserialize(serializer,
+                        _decompress(compressor, base64.b64decode(body)))
+
+
+class PayloadCodec(object):
+    """ Encode return data before they stored inside redis.
+
+    Each encoded record represent as::
+
+        $version (1 char) $serializer (1 char) $compressor (1 char) $body
+
+    When payload was serialized via msgpack or compressed, the ``body``
+    will be base64 encoded, since the redis connections of runners decode
+    all responses as utf-8 strings. Otherwise the ``body`` is the plain
+    json document.
+
+    With ``compress="auto"``, payloads larger than ``threshold`` bytes are
+    compressed via zstd (if available) or zlib, smaller ones are not.
+    """
+
+    def __init__(self, serializer="json", compress=COMPRESS_AUTO,
+                 threshold=COMPRESS_THRESHOLD):
+        """ Initialize PayloadCodec instance. """
+        try:
+            self._serializer = SERIALIZERS[serializer]
+        except KeyError:
+            raise ConfigError("bad payload serializer \"{0}\"".format(
+                serializer))
+        if self._serializer == SERIALIZER_MSGPACK:
+            _require(msgpack, "msgpack")
+
+        if compress == COMPRESS_AUTO:
+            self._compressor = None
+            self._auto = COMPRESS_ZSTD if zstandard else COMPRESS_ZLIB
+        else:
+            try:
+                self._compressor = COMPRESSORS[compress]
+            except KeyError:
+                raise ConfigError("bad payload compressor \"{0}\"".format(
+                    compress))
+            if self._compressor == COMPRESS_ZSTD:
+                _require(zstandard, "zstandard")
+        self._threshold = threshold
+
+    def encode(self, data):
+        """ Encode ``data`` into record string. """
+        payload = _serialize(self._serializer, data)
+
+        compressor = self._compressor
+        if compressor == None:
+            compressor = (self._auto if len(payload) > self._threshold
+                          else COMPRESS_NONE)
+
+        if self._serializer == SERIALIZER_JSON and compressor == COMPRESS_NONE:
+            body = payload.decode('utf-8')
+        else:
+            body = base64.b64encode(
+                _compress(compressor, payload)).decode('ascii')
+        return "".join([CODEC_VERSION, self._serializer, compressor, body])
+
+    decode = staticmethod(decode)
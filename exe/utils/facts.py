@@ -0,0 +1,115 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import time
+import logging
+
+from exe.utils.codec import PayloadCodec, decode
+
+
+LOG = logging.getLogger(__name__)
+
+
+## Consts ##
+FACTS_TTL = 86400       # seconds facts kept inside cache
+FACTS_MAX_AGE = 300     # max seconds facts are fresh
+DEFAULT_CODEC = PayloadCodec()
+
+
+class FactCache(object):
+    """ Cache of facts of remote hosts inside redis.
+
+    Facts of each host gathered by ``FacterRunner`` are stored as a redis
+    hash, which expires ``ttl`` seconds after gathered:
+        facts:$fqdn -> {
+            'facts' -> $facter_return_context (encoded)
+            'at'    -> $timestamp (when the facts gathered)
+        }
+
+    Each host queried via the cache is recorded with the query timestamp,
+    hosts queried recently are the hot hosts kept warm by the refresher:
+        facts:hot -> { $fqdn: $timestamp, ... }
+
+    The same keys are also used by deploy of ansible executor as the fact
+    cache of ansible, see ``exe.executor._ansible_facts``.
+    """
+
+    def __init__(self, redis, ttl=FACTS_TTL, codec=DEFAULT_CODEC):
+        """ Initialize FactCache instance. """
+        self._redis = redis
+        self._ttl = ttl
+        self._codec = codec
+
+    @staticmethod
+    def _key(fqdn):
+        """ Format redis key of facts of host.
+
+        Full key name example:
+            facts:karazhan.vm.0ops.io
+        """
+        return "facts:{0}".format(fqdn)
+
+    @staticmethod
+    def _hot_key():
+        """ Format redis key of the hot hosts.
+
+        Full key name example:
+            facts:hot (sorted set of $fqdn scored by last query timestamp)
+        """
+        return "facts:hot"
+
+    def get(self, target, hot=True):
+        """ Return ``(facts, age)`` of host, ``(None, None)`` if not cached.
+
+        The ``facts`` is the return context of facter, the ``age`` is the
+        seconds passed since the facts gathered, the host is recorded as
+        hot host unless ``hot`` is ``False``.
+        """
+        now = time.time()
+
+        pipeline = self._redis.pipeline(False)
+        pipeline.hmget(self._key(target), ['facts', 'at'])
+        if hot:
+            pipeline.zadd(self._hot_key(), {target: now})
+        facts, at = pipeline.execute()[0]
+        if facts == None or at == None:
+            return None, None
+        return decode(facts), max(int(now - float(at)), 0)
+
+    def put(self, facts):
+        """ Store facts of hosts, ``facts`` is ``{ $fqdn -> $context }``. """
+        now = time.time()
+
+        pipeline = self._redis.pipeline(False)
+        for target, context in facts.items():
+            pipeline.hmset(self._key(target),
+                           dict(facts=self._codec.encode(context), at=now))
+            pipeline.expire(self._key(target), self._ttl)
+        pipeline.execute()
+
+    def delete(self, targets):
+        """ Delete facts of hosts. """
+        if targets:
+            self._redis.delete(*[ self._key(target) for target in targets ])
+
+    def targets(self):
+        """ Return hosts whose facts are cached. """
+        prefix = self._key("")
+        return [ key[len(prefix):]
+                 for key in self._redis.scan_iter(match=self._key("*"))
+                 if key != self._hot_key() ]
+
+    def gathered_at(self, targets):
+        """ Return timestamps of facts of hosts gathered, ``None`` if not cached. """
+        pipeline = self._redis.pipeline(False)
+        for target in targets:
+            pipeline.hget(self._key(target), 'at')
+        return [ float(at) if at != None else None
+                 for at in pipeline.execute() ]
+
+    def hot(self, since):
+        """ Return hosts queried after ``since``, forget the others. """
+        pipeline = self._redis.pipeline(False)
+        pipeline.zremrangebyscore(self._hot_key(), "-inf", "({0}".format(since))
+        pipeline.zrange(self._hot_key(), 0, -1)
+        _, targets = pipeline.execute()
+        return targets
@@ -0,0 +1,170 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import os
+import json
+import time
+import socket
+import hashlib
+import logging
+import os.path
+import tempfile
+
+from exe.utils.err import excinst
+
+
+__all__ = ["SpillStore", "SPILL_ATTR", "spill_queue"]
+
+
+LOG = logging.getLogger(__name__)
+
+
+## Consts ##
+SPILL_ATTR = "spill"        # attr of return data refers to the spilled one
+SPILL_KEEP = 4096           # chars kept at both head and tail of strings
+SPILL_TTL = 691200          # seconds spilled return data kept on disk
+SPILL_PURGE = 3600          # min seconds between two purges of spill dir
+SPILL_QUEUE = "exe.spill.{0}"
+
+
+def spill_queue(node=None):
+    """ Celery queue served by workers which can read spill dir of ``node``. """
+    return SPILL_QUEUE.format(node or socket.gethostname())
+
+
+def _truncate(value, keep):
+    """ Keep ``keep`` chars of both head and tail of oversized string. """
+    if len(value) <= keep * 2:
+        return value
+    return "{0}\n...<{1} chars truncated>...\n{2}".format(
+        value[:keep], len(value) - keep * 2, value[-keep:])
+
+
+class SpillStore(object):
+    """ Content-addressed store of oversized return data on local disk.
+
+    Return data of operation whose encoded size exceeds the limit of
+    that operation (``limits`` by operation name, or ``limit``, ``0`` for
+    no limit) is written into the spill directory, named by its sha1 hex
+    digest (``$path/$digest[:2]/$digest``, the same data is stored once),
+    and replaced by a capped copy which keeps only ``keep`` chars of both
+    head and tail of each string (other oversized values are emptied),
+    with a reference to the full one:
+        $return_data -> {
+            ...
+            'spill' -> {
+                'digest' -> $sha1_hex_digest
+                'size'   -> $bytes (of the full return data)
+                'queue'  -> $celery_queue (served by workers of this node)
+                'fields' -> [ $truncated_field, ... ]
+            }
+        }
+
+    Files older than ``ttl`` seconds are purged while writing, at most
+    once per ``SPILL_PURGE`` seconds.
+    """
+
+    def __init__(self, path, limit=0, keep=SPILL_KEEP, ttl=SPILL_TTL,
+                 limits=None):
+        """ Initialize SpillStore instance. """
+        self._path = path
+        self._limit = limit
+        self._keep = max(keep, 0)
+        self._ttl = ttl
+        self._limits = limits or {}
+        self._purged_at = 0
+
+    def limit(self, operate):
+        """ Max bytes of return data of ``operate``, ``0`` for no limit. """
+        return self._limits.get(operate, self._limit)
+
+    def cap(self, operate, data, size):
+        """ Return ``data`` itself, or the capped copy if it was spilled.
+
+        The ``size`` is the length of ``data`` encoded by the job codec,
+        ``data`` is only serialized again (into the spill file) when it is
+        larger than the limit.
+        """
+        limit = self.limit(operate)
+        if not limit or size <= limit or not isinstance(data, dict):
+            return data
+
+        payload = json.dumps(data).encode('utf-8')
+
+        capped = {}
+        fields = []
+        for attr, val in data.items():
+            if isinstance(val, str) and len(val) > self._keep * 2:
+                capped[attr] = _truncate(val, self._keep)
+            elif isinstance(val, (dict, list)) and (
+                    len(json.dumps(val)) > self._keep * 2):
+                capped[attr] = type(val)()
+            else:
+                capped[attr] = val
+                continue
+            fields.append(attr)
+
+        # the capped one is still stored if the spill dir is not
+        #   writable, without the reference to the full one
+        try:
+            digest = self.put(payload)
+        except (IOError, OSError):
+            LOG.error("spill return data of <{0}> bytes into <{1}> failed, "
+                      "{2}".format(len(payload), self._path, excinst()))
+            digest = None
+
+        capped[SPILL_ATTR] = dict(digest=digest, size=len(payload),
+                                  queue=spill_queue(), fields=sorted(fields))
+        return capped
+
+    def put(self, payload):
+        """ Write bytes ``payload`` into spill dir, return its digest. """
+        digest = hashlib.sha1(payload).hexdigest()
+        path = self._file(digest)
+        if os.path.exists(path):
+            os.utime(path, None)    # keep it from being purged
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.rename(tmp, path)
+            LOG.debug("return data <{0}> of <{1}> bytes spilled".format(
+                digest, len(payload)))
+        self._purge()
+        return digest
+
+    def load(self, digest):
+        """ Return the full return data of ``digest``, ``None`` if missing. """
+        try:
+            with open(self._file(digest), 'rb') as f:
+                return json.loads(f.read().decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _file(self, digest):
+        """ Path of spilled return data of ``digest``. """
+        if len(digest) != 40 or not all(c in "0123456789abcdef"
+                                        for c in digest):
+            raise ValueError("bad spill digest <{0}>".format(digest))
+        return os.path.join(self._path, digest[:2], digest)
+
+    def _purge(self):
+        """ Remove files older than ``ttl`` seconds. """
+        now = time.time()
+        if not self._ttl or now - self._purged_at < SPILL_PURGE:
+            return
+        self._purged_at = now
+
+        purged = 0
+        for root, _, files in os.walk(self._path):
+            for f in files:
+                path = os.path.join(root, f)
+                try:
+                    if now - os.stat(path).st_mtime > self._ttl:
+                        os.remove(path)
+                        purged += 1
+                except OSError:     # removed by others
+                    continue
+        if purged:
+            LOG.info("<{0}> spilled return data purged from <{1}>".format(
+                purged, self._path))
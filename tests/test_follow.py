@@ -0,0 +1,68 @@
+# (c) 2016, Hao Feng <whisperaven@gmail.com>
+
+import types
+import unittest
+
+from cherrypy.lib import is_closable_iterator
+
+from exe.exc import JobBusyError
+from exe.runner.jobs import JobQuerier
+
+
+class FakeJob(object):
+    """ Job yields its context and then events until closed. """
+
+    def __init__(self):
+        self.closed = False
+
+    def follow(self, redis, dispatcher, start, replay=False):
+        try:
+            yield {'jid': "fake"}
+            while True:
+                yield {'fake.host': {}, '__EVENT_ID__': "0-1"}
+        finally:
+            self.closed = True
+
+
+class FakeQuerier(object):
+    """ Follow methods of ``JobQuerier`` with one follow slot. """
+
+    cfg = types.SimpleNamespace(follow_max_clients=1)
+    dispatcher = None
+
+    _follow = JobQuerier._follow
+    _iter_follow = JobQuerier._iter_follow
+
+
+class TestFollow(unittest.TestCase):
+
+    def tearDown(self):
+        JobQuerier._followers = 0
+
+    def test_follow_response_is_closable(self):
+        events = FakeQuerier()._follow(FakeJob(), None, "0-0", False)
+        self.assertTrue(is_closable_iterator(events))
+        self.assertEqual(next(events), {'jid': "fake"})
+        events.close()
+
+    def test_slot_released_on_close(self):
+        job = FakeJob()
+        events = FakeQuerier()._follow(job, None, "0-0", False)
+        self.assertEqual(JobQuerier._followers, 1)
+        with self.assertRaises(JobBusyError):
+            FakeQuerier()._follow(FakeJob(), None, "0-0", False)
+
+        next(events)
+        next(events)
+        events.close()
+        self.assertTrue(job.closed)
+        self.assertEqual(JobQuerier._followers, 0)
+
+        # the slot can be taken again
+        events = FakeQuerier()._follow(FakeJob(), None, "0-0", False)
+        next(events)
+        events.close()
+
+
+if __name__ == "__main__":
+    unittest.main()